@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+
+EDUCATION_LEVELS = {
+    'Highschool': 'Highschool',
+    'Bachelors_Degree': 'Bachelors',
+    'Masters_Degree': 'Masters',
+    'Doctorate_Degree': 'Doctorate'
+}
+
+# Categorical filters besides company, all multi-select
+FILTER_DIMENSIONS = ('level', 'title', 'gender_category', 'education')
+
+def active_filters(filters):
+    """Drop unset dimensions and normalise single values to lists."""
+    if not filters:
+        return {}
+    return {dimension: [values] if isinstance(values, str) else list(values)
+            for dimension, values in filters.items() if values}
+
+def selection_dates(selected_range, min_date):
+    # Slider values are day offsets from the first response in the dataset
+    start_date = min_date + pd.Timedelta(days=selected_range[0])
+    end_date = min_date + pd.Timedelta(days=selected_range[1])
+    return start_date, end_date
+
+def filter_data(df, selected_range, selected_company, min_date=None, filters=None):
+    if min_date is None:
+        min_date = df['timestamp'].min()
+    start_date, end_date = selection_dates(selected_range, min_date)
+    mask = (df['timestamp'] >= start_date) & (df['timestamp'] <= end_date)
+    for dimension, values in active_filters(filters).items():
+        if dimension == 'education':
+            degrees = [column for column, level in EDUCATION_LEVELS.items() if level in values]
+            mask &= df[degrees].eq(1).any(axis=1)
+        else:
+            mask &= df[dimension].isin(values)
+    filtered_df = df[mask]
+
+    if selected_company:
+        if isinstance(selected_company, list):
+            return filtered_df[filtered_df["company_id"].isin(selected_company)].copy()
+        return filtered_df[filtered_df["company_id"] == selected_company].copy()
+    return filtered_df.copy()
+
+def _weights(company_df, weight):
+    if weight is None:
+        return pd.Series(1.0, index=company_df.index)
+    return company_df[weight]
+
+def location_averages(company_df, weight=None):
+    w = _weights(company_df, weight)
+    frame = company_df.assign(
+        _w=w,
+        _wcomp=company_df['totalyearlycompensation'] * w
+    )
+    grouped = frame.groupby(['latitude', 'longitude'], as_index=False).agg(
+        _wcomp=('_wcomp', 'sum'),
+        _w=('_w', 'sum'),
+        location=('location', 'first')
+    )
+    grouped['avg_salary'] = grouped['_wcomp'] / grouped['_w']
+    return grouped[['latitude', 'longitude', 'avg_salary', 'location']]
+
+def top_companies(company_df, n=10):
+    avg_salary_by_company = company_df.groupby('company')['totalyearlycompensation'].mean().reset_index()
+    return avg_salary_by_company.nlargest(n, 'totalyearlycompensation')
+
+def gender_categories(genders):
+    return genders.dropna().map(
+        lambda x: 'male' if str(x).lower() in ['m', 'male']
+        else ('female' if str(x).lower() in ['f', 'female'] else 'other')
+    )
+
+def gender_counts(company_df):
+    counts = gender_categories(company_df['gender']).value_counts().reset_index()
+    counts.columns = ['gender', 'count']
+    return counts
+
+def education_distribution(company_df):
+    education_df = company_df.melt(
+        id_vars=['totalyearlycompensation'],
+        value_vars=list(EDUCATION_LEVELS),
+        var_name='Education_Level',
+        value_name='Degree'
+    )
+    education_df = education_df[education_df['Degree'] == 1].copy()
+    education_df['Education_Level'] = education_df['Education_Level'].replace(EDUCATION_LEVELS)
+    return education_df
+
+def summary_stats(company_df, weight=None, fraction=None):
+    """Response count and averages for the summary cards.
+
+    With ``weight``/``fraction`` the frame is treated as a sample and the
+    estimates come back with 95% error bounds in ``*_error`` keys.
+    """
+    if len(company_df) == 0:
+        stats = {'total_responses': 0, 'avg_comp': 0, 'avg_experience': 0}
+        if fraction is not None:
+            stats.update(total_responses_error=0, avg_comp_error=0, avg_experience_error=0)
+        return stats
+
+    w = _weights(company_df, weight)
+    stats = {'total_responses': int(round(w.sum()))}
+    for key, col in [('avg_comp', 'totalyearlycompensation'), ('avg_experience', 'yearsofexperience')]:
+        values = company_df[col]
+        mask = values.notna()
+        stats[key] = np.average(values[mask], weights=w[mask]) if mask.any() else 0
+        if fraction is not None:
+            n = int(mask.sum())
+            std = values[mask].std() if n > 1 else 0
+            stats[key + '_error'] = 1.96 * std * np.sqrt((1 - fraction) / n) if n else 0
+
+    if fraction is not None:
+        # Bernoulli-style sampling: Var(N_hat) ~= n (1 - f) / f^2
+        stats['total_responses_error'] = 1.96 * np.sqrt(len(company_df) * (1 - fraction)) / fraction
+    return stats
@@ -0,0 +1,163 @@
+"""Read-only JSON API over the dashboard aggregates.
+
+All endpoints accept ``start``/``end`` (ISO dates, ``end`` inclusive) and any
+number of ``company``, ``level``, ``title``, ``gender`` and ``education``
+parameters, e.g.
+``/api/top-companies?start=2019-01-01&end=2019-12-31&company=Google&company=Apple&level=L5``.
+
+``/api/ingest-report`` returns the row accounting of the load the dashboard
+is serving: rows read and kept, rejections and blanked values per reason.
+
+Responses are a pure function of the dataset version and the query, so the
+strong ETag is derived from those alone. The query is validated first, so a
+bad one is always a 400, and ``If-None-Match`` revalidations are then
+answered with a 304 before any aggregation runs.
+"""
+import hashlib
+import json
+
+import pandas as pd
+from flask import Blueprint, Response, jsonify, request
+
+from aggregates import (location_averages, top_companies, gender_counts, education_distribution,
+                        summary_stats)
+from data import get_data
+
+api = Blueprint('api', __name__, url_prefix='/api')
+
+MAX_TOP_N = 100
+# Query parameter for each categorical filter
+FILTER_PARAMS = {'level': 'level', 'title': 'title', 'gender_category': 'gender', 'education': 'education'}
+
+class BadRequest(ValueError):
+    pass
+
+@api.errorhandler(BadRequest)
+def bad_request(error):
+    return jsonify(error=str(error)), 400
+
+def parse_date(name, default):
+    value = request.args.get(name)
+    if not value:
+        return default
+    try:
+        timestamp = pd.Timestamp(value)
+    except ValueError:
+        raise BadRequest(f"invalid {name} date: {value!r}")
+    # Stored timestamps are naive; aware ones are compared in UTC
+    return timestamp.tz_convert(None) if timestamp.tzinfo is not None else timestamp
+
+def parse_selection(data):
+    """Translate the query into the slider range, company selection and filters the callbacks use."""
+    start_date = parse_date('start', data.min_date)
+    end_date = parse_date('end', data.max_date)
+    if request.args.get('end') and end_date == end_date.normalize():
+        # A bare end date includes the whole day
+        end_date += pd.Timedelta(days=1) - pd.Timedelta(1)
+    if end_date < start_date:
+        raise BadRequest("end is before start")
+
+    # Fractional day offsets keep the requested bounds exact
+    day = pd.Timedelta(days=1)
+    selected_range = [(start_date - data.min_date) / day, (end_date - data.min_date) / day]
+    names = request.args.getlist('company')
+    ids = data.companies.lookup(names)
+    unknown = [name for name, company_id in zip(names, ids) if company_id is None]
+    if unknown:
+        raise BadRequest(f"unknown company: {unknown[0]!r}")
+    # Any spelling of a company resolves to its canonical id
+    companies = sorted(set(ids))
+    filters = {dimension: sorted(set(request.args.getlist(param))) for dimension, param in FILTER_PARAMS.items()}
+    return selected_range, companies or None, filters
+
+def parse_int(name, default, upper):
+    value = request.args.get(name, default)
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise BadRequest(f"{name} must be an integer")
+    if not 1 <= value <= upper:
+        raise BadRequest(f"{name} must be between 1 and {upper}")
+    return value
+
+def records(frame):
+    # Round-trip through pandas' JSON writer so NaN becomes null
+    return json.loads(frame.to_json(orient='records', date_format='iso'))
+
+def cached_json(compute, parse=parse_selection):
+    """Answer with a strong ETag tied to the dataset version and query.
+
+    ``parse`` validates the query and its result is passed on to ``compute``.
+    """
+    data = get_data()
+    args = parse(data)
+    query = sorted((key, value) for key in request.args for value in request.args.getlist(key))
+    digest = hashlib.sha256(json.dumps([data.version, request.path, query]).encode()).hexdigest()
+    etag = digest[:32]
+
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        response = jsonify(compute(data, *args))
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@api.route('/summary')
+def summary():
+    def compute(data, selected_range, companies, filters):
+        stats = summary_stats(data.filter(selected_range, companies, filters))
+        percentiles = data.percentiles(selected_range, companies, filters=filters)
+        return {
+            'total_responses': stats['total_responses'],
+            'avg_comp': float(stats['avg_comp']),
+            'avg_experience': float(stats['avg_experience']),
+            'percentiles': {
+                col: {f"p{q * 100:.0f}": None if pd.isna(v) else float(v) for q, v in values.items()}
+                for col, values in percentiles.items()
+            }
+        }
+    return cached_json(compute)
+
+@api.route('/top-companies')
+def top_companies_endpoint():
+    def parse(data):
+        statistic = request.args.get('statistic', 'median')
+        if statistic not in ('median', 'mean'):
+            raise BadRequest("statistic must be 'median' or 'mean'")
+        return (*parse_selection(data), parse_int('n', 10, MAX_TOP_N), statistic)
+
+    def compute(data, selected_range, companies, filters, n, statistic):
+        if statistic == 'median':
+            top = data.median_top_companies(selected_range, companies, n, filters)
+        else:
+            top = top_companies(data.filter(selected_range, companies, filters), n)
+        return {'statistic': statistic, 'companies': records(top)}
+    return cached_json(compute, parse)
+
+@api.route('/locations')
+def locations():
+    def compute(data, selected_range, companies, filters):
+        return {'locations': records(location_averages(data.filter(selected_range, companies, filters)))}
+    return cached_json(compute)
+
+@api.route('/education')
+def education():
+    def compute(data, selected_range, companies, filters):
+        education_df = education_distribution(data.filter(selected_range, companies, filters))
+        levels = education_df.groupby('Education_Level')['totalyearlycompensation'].describe()
+        levels = levels.rename(columns={'25%': 'p25', '50%': 'median', '75%': 'p75'}).reset_index()
+        return {'education': records(levels)}
+    return cached_json(compute)
+
+@api.route('/gender')
+def gender():
+    def compute(data, selected_range, companies, filters):
+        return {'gender': records(gender_counts(data.filter(selected_range, companies, filters)))}
+    return cached_json(compute)
+
+@api.route('/ingest-report')
+def ingest_report():
+    def compute(data):
+        return data.ingest_report.to_dict() if data.ingest_report is not None else {}
+    return cached_json(compute, lambda data: ())
@@ -1,206 +1,209 @@
+import os
 import pandas as pd
 import dash
-from dash import dcc, html
-import altair as alt
+from dash import dcc, html, no_update, Patch
 from dash.dependencies import Input, Output, State
-import plotly.express as px
-import multiprocessing as mp
 from functools import partial
 import numpy as np
 from dash.exceptions import PreventUpdate
+from aggregates import (location_averages, top_companies, gender_counts, education_distribution,
+                        summary_stats)
+from cache import ResultCache, result_key
+from charts import (create_map_chart, create_bar_chart, create_pie_chart, create_scatter_chart,
+                    create_education_chart, create_trend_chart, mark_approximate, approximate_annotation,
+                    MAP_TRACE_FIELDS, map_trace_values, map_signature)
+from sampling import pick_sample
+from data import dataset_version, get_data
+from api import api
+from metadata import load_metadata, write_metadata
 
-alt.data_transformers.disable_max_rows()
-
-def load_data():
-    df = pd.read_csv('data/processed/your_output_file.csv')
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-    df['latitude'] = pd.to_numeric(df['latitude'], errors='coerce')
-    df['longitude'] = pd.to_numeric(df['longitude'], errors='coerce')
-    df.replace("NA", pd.NA, inplace=True)
-
-    numeric_cols = ["basesalary", "stockgrantvalue", "bonus", 
-                    "totalyearlycompensation", "yearsofexperience", "yearsatcompany"]
-    for col in numeric_cols:
-        df[col] = pd.to_numeric(df[col], errors="coerce")
-
-    df = df[df['totalyearlycompensation'] > 0]
-    return df
-
-def create_map_chart(grouped):
-    map_fig = px.scatter_mapbox(
-        grouped,
-        lat="latitude",
-        lon="longitude",
-        size="avg_salary",
-        color="avg_salary",
-        hover_name="location",
-        hover_data={"avg_salary": ":.2f"},
-        color_continuous_scale="Viridis",
-        size_max=15,
-        zoom=1.5,
-        center={"lat": 20, "lon": 0},
-        opacity=0.6
-    )
-    map_fig.update_layout(
-        mapbox_style="open-street-map",
-        margin={"r":0, "t":0, "l":0, "b":0},
-    )
-    return map_fig
-
-def create_bar_chart(top_10_companies):
-    bar_chart = alt.Chart(top_10_companies).mark_bar().encode(
-        x=alt.X('company:N', sort='-y', axis=alt.Axis(labelAngle=-45)),
-        y=alt.Y('totalyearlycompensation:Q', title='Average Yearly Compensation ($)'),
-        color=alt.Color('totalyearlycompensation:Q', 
-                    scale=alt.Scale(
-                        domain=[top_10_companies['totalyearlycompensation'].min(), 
-                                top_10_companies['totalyearlycompensation'].max()],
-                        range=['#ADD8E6', '#00008B']
-                    ),legend=None
-                    )
-    ).properties(
-        width=200,
-        height=180
-    )
-    return bar_chart.to_html()
-
-def create_pie_chart(gender_counts):
-    pie_chart = alt.Chart(gender_counts).mark_arc().encode(
-        theta='count:Q',
-        color=alt.Color('gender:N', scale=alt.Scale(domain=['male', 'female', 'other'])),
-        tooltip=['gender:N', 'count:Q']
-    ).properties(
-        width=180,
-        height=180
-    )
-    return pie_chart.to_html()
-
-def create_scatter_chart(company_df):
-    scatter_fig = px.scatter(
-        company_df,
-        x="yearsofexperience",
-        y="totalyearlycompensation",
-        color="level",
-        hover_data=["title", "basesalary", "stockgrantvalue", "bonus", "location"]
-    )
-    scatter_fig.update_layout(
-        xaxis_title="Years of Experience", 
-        yaxis_title="Total Compensation"
-    )
-    return scatter_fig
-
-def create_education_chart(education_df):
-    violin_fig = px.violin(
-        education_df,
-        x="Education_Level",
-        y="totalyearlycompensation",
-        box=True,
-        points="all",
-        labels={"totalyearlycompensation": "Total Yearly Compensation ($)", "Education_Level": "Education Level"}
-    )
-    violin_fig.update_layout(
-        yaxis_title="Total Yearly Compensation ($)",
-        xaxis_title="Education Level"
-    )
-    return violin_fig
+PROGRESSIVE_RENDERING = os.environ.get('PROGRESSIVE_RENDERING', '1') != '0'
+# Directory written by batch_render.py to pre-populate the result cache from
+WARM_CACHE_DIR = os.environ.get('WARM_CACHE_DIR')
 
-def apply_chart_creation(func_data_tuple):
-    func, data = func_data_tuple
-    return func(data)
-
-def process_charts(company_df):
-    # Create a pool of workers
-    pool = mp.Pool(processes=4)
-    
-    # Prepare data for parallel processing
-    grouped = company_df.groupby(['latitude', 'longitude'], as_index=False).agg(
-        avg_salary=('totalyearlycompensation', 'mean'),
-        location=('location', 'first')
-    )
-    
-    avg_salary_by_company = company_df.groupby('company')['totalyearlycompensation'].mean().reset_index()
-    top_10_companies = avg_salary_by_company.nlargest(10, 'totalyearlycompensation')
-    
-    company_df['gender_category'] = company_df['gender'].dropna().map(
-        lambda x: 'male' if str(x).lower() in ['m', 'male'] 
-        else ('female' if str(x).lower() in ['f', 'female'] else 'other')
-    )
-    gender_counts = company_df['gender_category'].value_counts().reset_index()
-    gender_counts.columns = ['gender', 'count']
-    
-    education_df = company_df.melt(
-        id_vars=['totalyearlycompensation'],
-        value_vars=['Highschool', 'Bachelors_Degree', 'Masters_Degree', 'Doctorate_Degree'],
-        var_name='Education_Level',
-        value_name='Degree'
-    )
-    education_df = education_df[education_df['Degree'] == 1]
-    education_df['Education_Level'] = education_df['Education_Level'].replace({
-        'Highschool': 'Highschool',
-        'Bachelors_Degree': 'Bachelors',
-        'Masters_Degree': 'Masters',
-        'Doctorate_Degree': 'Doctorate'
+def summary_card(title, value, note=None, details=()):
+    children = [
+        html.H4(title, style={
+            'padding': '10px', 
+            'margin': '5px 0', 
+            'textAlign': 'center',
+            'width': '100%',
+            'fontFamily': 'Roboto, sans-serif',
+            'fontSize': '18px',
+            'fontWeight': 'bold',
+            'color': '#4682B4'
+        }),
+        html.P(value, style={
+            'padding': '10px', 
+            'margin': '5px 0', 
+            'textAlign': 'center',
+            'width': '100%',
+            'fontFamily': 'Roboto, sans-serif',
+            'fontSize': '39px',
+            'fontWeight': 'bold',  
+            'color': '#666666'
+        })
+    ]
+    for detail in details:
+        children.append(html.P(detail, style={
+            'margin': '0',
+            'textAlign': 'center',
+            'fontFamily': 'Roboto, sans-serif',
+            'fontSize': '14px',
+            'color': '#666666'
+        }))
+    if note:
+        children.append(html.P(note, style={
+            'margin': '0',
+            'textAlign': 'center',
+            'fontFamily': 'Roboto, sans-serif',
+            'fontSize': '14px',
+            'color': '#B22222'
+        }))
+    return html.Div(children, style={
+        'padding': '10px', 
+        'margin': '5px 0', 
+        'textAlign': 'center',
+        'width': '100%',
+        'backgroundColor': '#F5F7FA'
     })
-    
-    # Run chart creation in parallel
-    results = pool.map(
-        apply_chart_creation,
-        [
-            (create_map_chart, grouped),
-            (create_bar_chart, top_10_companies),
-            (create_pie_chart, gender_counts),
-            (create_scatter_chart, company_df),
-            (create_education_chart, education_df)
-        ]
-    )
-    
-    pool.close()
-    pool.join()
-    
-    return results
 
-# Initialize the dashboard
-df = load_data()
-min_date = df['timestamp'].min()
-max_date = df['timestamp'].max()
-df['timestamp_numeric'] = (df['timestamp'] - min_date).dt.days
+def map_update(fig, map_state, note=None):
+    """Full map figure on first render, then only the marker arrays that changed.
+
+    ``fig`` is a figure dict from create_map_chart. Returns the value for
+    map-graph.figure (a figure, a Patch or no_update) and the new map-state.
+    """
+    state = {"signature": map_signature(fig), "approximate": note is not None}
+    annotations = [approximate_annotation(note)] if note else []
+    if not map_state:
+        return dict(fig, layout=dict(fig["layout"], annotations=annotations)), state
+    if map_state == state:
+        return no_update, no_update
+
+    patch = Patch()
+    if map_state["signature"] != state["signature"]:
+        for path, value in zip(MAP_TRACE_FIELDS, map_trace_values(fig)):
+            target = patch["data"][0]
+            for key in path[:-1]:
+                target = target[key]
+            target[path[-1]] = value
+    if map_state["approximate"] != state["approximate"] or note:
+        patch["layout"]["annotations"] = annotations
+    return patch, state
+
+def format_money(value):
+    return "n/a" if pd.isna(value) else f"${value:,.0f}"
+
+def create_summary_cards(stats, fraction=None, percentiles=None):
+    # With a sample fraction the cards show estimates with 95% error bounds
+    prefix = "≈ " if fraction else ""
+    def note(key, fmt):
+        if not fraction:
+            return None
+        return f"± {fmt.format(stats[key + '_error'])} ({fraction:.0%} sample)"
 
+    return html.Div([
+        summary_card("Total Responses", f"{prefix}{stats['total_responses']}",
+                     note('total_responses', "{:,.0f}")),
+        summary_card("Average Total Compensation", f"{prefix}${stats['avg_comp']:,.2f}",
+                     note('avg_comp', "${:,.0f}")),
+        summary_card("Average Years of Experience", f"{prefix}{stats['avg_experience']:.1f}",
+                     note('avg_experience', "{:.1f}")),
+    ] + ([] if percentiles is None else [
+        summary_card("Median Total Compensation", format_money(percentiles['totalyearlycompensation'][0.5]),
+                     details=[" · ".join(f"P{q * 100:.0f} {format_money(percentiles['totalyearlycompensation'][q])}"
+                                         for q in (0.25, 0.75, 0.9))]),
+        summary_card("Median Base Salary", format_money(percentiles['basesalary'][0.5]), details=[
+            f"Median Stock {format_money(percentiles['stockgrantvalue'][0.5])}",
+            f"Median Bonus {format_money(percentiles['bonus'][0.5])}"
+        ]),
+    ]), style={
+        'display': 'flex',
+        'flexDirection': 'column',
+        'justifyContent': 'space-around',
+        'alignItems': 'center',
+        'width': '100%'
+    })
+
+# Initialize the dashboard; the data itself is loaded on the first callback
 app = dash.Dash(__name__, title='tech salary analytics')
 server = app.server
+server.register_blueprint(api)
+
+results = ResultCache(maxsize=int(os.environ.get('RESULT_CACHE_SIZE', 256)),
+                      maxbytes=int(os.environ.get('RESULT_CACHE_BYTES', 128 * 2**20)))
+if WARM_CACHE_DIR:
+    results.load_dir(WARM_CACHE_DIR, dataset_version())
+
+_metadata = None
+
+def get_metadata():
+    # Layout inputs come from the precomputed metadata file when it is current
+    global _metadata
+    if _metadata is None:
+        _metadata = load_metadata()
+        if _metadata is None:
+            data = get_data()
+            _metadata = write_metadata(data.df, data.version)
+    return _metadata
+
+# Dropdown for each categorical filter, with its label
+FILTER_DROPDOWNS = {
+    'level': ("level-dropdown", "Level:"),
+    'title': ("title-dropdown", "Job Title:"),
+    'gender_category': ("gender-dropdown", "Gender:"),
+    'education': ("education-dropdown", "Education:")
+}
+FILTER_INPUTS = [Input(dropdown_id, "value") for dropdown_id, _ in FILTER_DROPDOWNS.values()]
+
+def selected_filters(level, title, gender_category, education):
+    return {'level': level, 'title': title, 'gender_category': gender_category, 'education': education}
 
-selector = html.Div([
-    html.Label("Date Range:"),
-    dcc.RangeSlider(
-        id="timestamp-slider",
-        min=0,
-        max=(max_date - min_date).days,
-        value=[0, (max_date - min_date).days],
-        marks={
-            i: (min_date + pd.Timedelta(days=i)).strftime('%Y')
-            for i in range(
-                0,
-                (max_date - min_date).days + 1,
-                max(1, (max_date - min_date).days // 4)
+def build_selector(metadata):
+    filter_controls = []
+    for dimension, (dropdown_id, label) in FILTER_DROPDOWNS.items():
+        filter_controls += [
+            html.Br(),
+            html.Label(label),
+            dcc.Dropdown(
+                id=dropdown_id,
+                options=[{"label": str(v).capitalize() if dimension == 'gender_category' else v, "value": v}
+                         for v in metadata['filters'][dimension]],
+                value=None,
+                clearable=True,
+                placeholder="Any",
+                multi=True
             )
-        },
-        step=1
-    ),
-    html.Br(),
-    html.Label("Company:"),
-    dcc.Dropdown(
-        id="company-dropdown",
-        options=[{"label": c, "value": c} for c in sorted(df["company"].dropna().unique())],
-        value=None,
-        clearable=True,
-        placeholder="Select one or more companies",
-        multi=True
-    ),
-], style={
-    'width': '95%',
-    'padding': '10px',
-    'boxSizing': 'border-box',
-    'border': '1px solid #ccc'
-})
+        ]
+
+    return html.Div([
+        html.Label("Date Range:"),
+        dcc.RangeSlider(
+            id="timestamp-slider",
+            min=0,
+            max=metadata['days'],
+            value=[0, metadata['days']],
+            marks={int(i): label for i, label in metadata['marks'].items()},
+            step=1
+        ),
+        html.Br(),
+        html.Label("Company:"),
+        dcc.Dropdown(
+            id="company-dropdown",
+            options=[{"label": name, "value": company_id} for company_id, name in metadata['companies']],
+            value=None,
+            clearable=True,
+            placeholder="Select one or more companies",
+            multi=True
+        ),
+        *filter_controls
+    ], style={
+        'width': '95%',
+        'padding': '10px',
+        'boxSizing': 'border-box',
+        'border': '1px solid #ccc'
+    })
 
 summary_cards = html.Div(
     id="summary-cards",
@@ -222,6 +225,7 @@ graph_tab1 = html.Div([
             dcc.Loading(
                 id="loading-map",
                 type="circle",
+                overlay_style={"visibility": "visible", "opacity": 0.5},
                 children=dcc.Graph(id="map-graph", style={"width": "100%", "height": "800px"})
             )
         ], style={'width': '100%', 'display': 'inline-block', 'verticalAlign': 'top'}),
@@ -240,7 +244,13 @@ graph_tab1 = html.Div([
             ], style={'width': '100%', 'height': '300px'}),
 
             html.Div([
-                html.H3("Top Companies by Average Salary", style={'textAlign': 'left'}),
+                html.H3("Top Companies by Salary", style={'textAlign': 'left'}),
+                dcc.RadioItems(
+                    id="bar-statistic",
+                    options=[{"label": "Median", "value": "median"}, {"label": "Mean", "value": "mean"}],
+                    value="median",
+                    inline=True
+                ),
                 dcc.Loading(
                     id="loading-bar",
                     type="circle",
@@ -262,6 +272,7 @@ graph_tab2 = html.Div([
             dcc.Loading(
                 id="loading-education",
                 type="circle",
+                overlay_style={"visibility": "visible", "opacity": 0.5},
                 children=dcc.Graph(id="education-boxplot", style={'width': '100%', 'height': '900px'})
             )
         ], style={'width': '50%', 'padding': '10px', 'boxSizing': 'border-box'}),
@@ -271,6 +282,7 @@ graph_tab2 = html.Div([
             dcc.Loading(
                 id="loading-scatter",
                 type="circle",
+                overlay_style={"visibility": "visible", "opacity": 0.5},
                 children=dcc.Graph(id="scatter-graph", style={'width': '100%', 'height': '900px'})
             )
         ], style={'width': '50%', 'padding': '10px', 'boxSizing': 'border-box'})
@@ -283,288 +295,212 @@ graph_tab2 = html.Div([
     })
 ], style={'width': '100%', 'padding': '10px'})
 
-app.layout = html.Div([
-    html.H1("Tech Salary Analytics Dashboard", style={'textAlign': 'center', 'marginTop': '10px','fontSize': '40px','fontWeight': 'bold','textShadow': '1px 1px 2px rgba(0, 0, 0, 0.3)'}),
-    
+graph_tab3 = html.Div([
     html.Div([
+        html.H3("Compensation Trend by Month", style={'textAlign': 'left', 'marginBottom': '10px'}),
         html.Div([
-            selector,
-            summary_cards
-        ], style={'width': '15%', 'minWidth': '250px', 'padding': '10px', 'backgroundColor': '#E6F0FA'}),
-        
+            html.Label("Rolling window (months):", style={'marginRight': '10px'}),
+            dcc.RadioItems(
+                id="trend-window",
+                options=[{"label": str(months), "value": months} for months in (1, 3, 6, 12)],
+                value=3,
+                inline=True
+            )
+        ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '10px'}),
+        dcc.Loading(
+            id="loading-trend",
+            type="circle",
+            overlay_style={"visibility": "visible", "opacity": 0.5},
+            children=dcc.Graph(id="trend-graph", style={'width': '100%', 'height': '800px'})
+        )
+    ], style={'width': '100%', 'padding': '10px', 'boxSizing': 'border-box'})
+], style={'width': '100%', 'padding': '10px'})
+
+def serve_layout():
+    return html.Div([
+        dcc.Store(id="refine-request"),
+        dcc.Store(id="map-state"),
+        html.H1("Tech Salary Analytics Dashboard", style={'textAlign': 'center', 'marginTop': '10px','fontSize': '40px','fontWeight': 'bold','textShadow': '1px 1px 2px rgba(0, 0, 0, 0.3)'}),
+    
         html.Div([
-            dcc.Tabs(id="tabs", value='tab-1', children=[
-                dcc.Tab(label='General Analytics', value='tab-1', children=[graph_tab1],
-                        style={'fontSize': '1.2vw', 'padding': '5px', 'width': '50%', 'height': '50px', 'backgroundColor': '#E6F0FA'},
-                        selected_style={'fontSize': '1.0vw', 'padding': '5px', 'width': '50%', 'height': '50px', 'backgroundColor': '#4682B4'}),
-                dcc.Tab(label='Education/Experience', value='tab-2', children=[graph_tab2],
-                        style={'fontSize': '1.2vw', 'padding': '5px', 'width': '50%', 'height': '50px', 'backgroundColor': '#E6F0FA'},
-                        selected_style={'fontSize': '1.0vw', 'padding': '5px', 'width': '50%', 'height': '50px', 'backgroundColor': '#4682B4'})
-            ], style={'fontSize': '14px', 'width': '40%', 'display': 'flex', 'flexWrap': 'nowrap', 'overflowX': 'auto'})
-        ], style={'width': '85%', 'padding': '10px'})
-    ], style={'display': 'flex', 'flexDirection': 'row', 'width': '100%'})
-], style={'width': '100%', 'height': '100%', 'margin': '0 auto', 'boxSizing': 'border-box'})
+            html.Div([
+                build_selector(get_metadata()),
+                summary_cards
+            ], style={'width': '15%', 'minWidth': '250px', 'padding': '10px', 'backgroundColor': '#E6F0FA'}),
+        
+            html.Div([
+                dcc.Tabs(id="tabs", value='tab-1', children=[
+                    dcc.Tab(label='General Analytics', value='tab-1', children=[graph_tab1],
+                            style={'fontSize': '1.2vw', 'padding': '5px', 'width': '33%', 'height': '50px', 'backgroundColor': '#E6F0FA'},
+                            selected_style={'fontSize': '1.0vw', 'padding': '5px', 'width': '33%', 'height': '50px', 'backgroundColor': '#4682B4'}),
+                    dcc.Tab(label='Education/Experience', value='tab-2', children=[graph_tab2],
+                            style={'fontSize': '1.2vw', 'padding': '5px', 'width': '33%', 'height': '50px', 'backgroundColor': '#E6F0FA'},
+                            selected_style={'fontSize': '1.0vw', 'padding': '5px', 'width': '33%', 'height': '50px', 'backgroundColor': '#4682B4'}),
+                    dcc.Tab(label='Trends', value='tab-3', children=[graph_tab3],
+                            style={'fontSize': '1.2vw', 'padding': '5px', 'width': '33%', 'height': '50px', 'backgroundColor': '#E6F0FA'},
+                            selected_style={'fontSize': '1.0vw', 'padding': '5px', 'width': '33%', 'height': '50px', 'backgroundColor': '#4682B4'})
+                ], style={'fontSize': '14px', 'width': '40%', 'display': 'flex', 'flexWrap': 'nowrap', 'overflowX': 'auto'})
+            ], style={'width': '85%', 'padding': '10px'})
+        ], style={'display': 'flex', 'flexDirection': 'row', 'width': '100%'})
+    ], style={'width': '100%', 'height': '100%', 'margin': '0 auto', 'boxSizing': 'border-box'})
+
+app.layout = serve_layout
 
+# Progressive rendering: wide selections are first drawn from a stratified
+# sample, then the refine callbacks below replace them with exact results.
 @app.callback(
-    Output("summary-cards", "children"),
+    [
+        Output("map-graph", "figure", allow_duplicate=True),
+        Output("map-state", "data", allow_duplicate=True),
+        Output("scatter-graph", "figure", allow_duplicate=True),
+        Output("education-boxplot", "figure", allow_duplicate=True),
+        Output("summary-cards", "children", allow_duplicate=True),
+        Output("refine-request", "data")
+    ],
     [
         Input("timestamp-slider", "value"),
-        Input("company-dropdown", "value")
-    ]
+        Input("company-dropdown", "value"),
+        *FILTER_INPUTS
+    ],
+    State("map-state", "data"),
+    prevent_initial_call='initial_duplicate'
 )
-def update_dashboard(selected_range, selected_company):
-    start_date = df['timestamp'].min() + pd.Timedelta(days=selected_range[0])
-    end_date = df['timestamp'].min() + pd.Timedelta(days=selected_range[1])
-    filtered_df = df[(df['timestamp'] >= start_date) & (df['timestamp'] <= end_date)]
-    
-    if selected_company:
-        if isinstance(selected_company, list):
-            company_df = filtered_df[filtered_df["company"].isin(selected_company)].copy()
-        else:
-            company_df = filtered_df[filtered_df["company"] == selected_company].copy()
-    else:
-        company_df = filtered_df.copy()
-    
-    # Calculate summary statistics first (these are quick)
-    total_responses = len(company_df)
-    avg_comp = company_df['totalyearlycompensation'].mean() if len(company_df) > 0 else 0
-    avg_experience = company_df['yearsofexperience'].mean() if len(company_df) > 0 else 0
-    
-    # Create summary cards
-    cards = html.Div([
-        html.Div([
-            html.H4("Total Responses", style={
-                'padding': '10px', 
-                'margin': '5px 0', 
-                'textAlign': 'center',
-                'width': '100%',
-                'fontFamily': 'Roboto, sans-serif',
-                'fontSize': '18px',
-                'fontWeight': 'bold',
-                'color': '#4682B4'
-            }),
-            html.P(f"{total_responses}", style={
-                'padding': '10px', 
-                'margin': '5px 0', 
-                'textAlign': 'center',
-                'width': '100%',
-                'fontFamily': 'Roboto, sans-serif',
-                'fontSize': '39px',  
-                'fontWeight': 'bold',
-                'color': '#666666'  
-            })
-        ], style={
-            'padding': '10px', 
-            'margin': '5px 0', 
-            'textAlign': 'center',
-            'width': '100%',
-            'backgroundColor': '#F5F7FA'  
-        }),
-        html.Div([
-            html.H4("Average Total Compensation", style={
-                'padding': '10px', 
-                'margin': '5px 0', 
-                'textAlign': 'center',
-                'width': '100%',
-                'fontFamily': 'Roboto, sans-serif',
-                'fontSize': '18px',
-                'fontWeight': 'bold',
-                'color': '#4682B4'
-            }),
-            html.P(f"${avg_comp:,.2f}", style={
-                'padding': '10px', 
-                'margin': '5px 0', 
-                'textAlign': 'center',
-                'width': '100%',
-                'fontFamily': 'Roboto, sans-serif',
-                'fontSize': '39px',
-                'fontWeight': 'bold',  
-                'color': '#666666'
-            })
-        ], style={
-            'padding': '10px', 
-            'margin': '5px 0', 
-            'textAlign': 'center',
-            'width': '100%',
-            'backgroundColor': '#F5F7FA'
-        }),
-        html.Div([
-            html.H4("Average Years of Experience", style={
-                'padding': '10px', 
-                'margin': '5px 0', 
-                'textAlign': 'center',
-                'width': '100%',
-                'fontFamily': 'Roboto, sans-serif',
-                'fontSize': '18px',
-                'fontWeight': 'bold',
-                'color': '#4682B4'
-            }),
-            html.P(f"{avg_experience:.1f}", style={
-                'padding': '10px', 
-                'margin': '5px 0', 
-                'textAlign': 'center',
-                'width': '100%',
-                'fontFamily': 'Roboto, sans-serif',
-                'fontSize': '39px',
-                'fontWeight': 'bold',  
-                'color': '#666666'
-            })
-        ], style={
-            'padding': '10px', 
-            'margin': '5px 0', 
-            'textAlign': 'center',
-            'width': '100%',
-            'backgroundColor': '#F5F7FA'
-        }),
-    ], style={
-        'display': 'flex',
-        'flexDirection': 'column',
-        'justifyContent': 'space-around',
-        'alignItems': 'center',
-        'width': '100%'
-    })
-    
-    return cards
+def preview_dashboard(selected_range, selected_company, level=None, title=None, gender_category=None,
+                      education=None, map_state=None):
+    filters = selected_filters(level, title, gender_category, education)
+    data = get_data()
+    if selected_range is None:
+        selected_range = data.full_range
+    request = {"range": selected_range, "company": selected_company, "filters": filters}
+
+    # Nothing to preview when the exact figures are already cached
+    cached = all(result_key(name, selected_range, selected_company, filters=filters) in results
+                 for name in ("map", "scatter", "education"))
+    picked = None
+    if PROGRESSIVE_RENDERING and not cached:
+        picked = pick_sample(data.samples, selected_range, selected_company, data.min_date, filters)
+    if picked is None:
+        return no_update, no_update, no_update, no_update, no_update, request
+
+    fraction, sample_df = picked
+    stats = summary_stats(sample_df, weight='sample_weight', fraction=fraction)
+    note = (f"≈ Approximate ({fraction:.0%} sample): average ${stats['avg_comp']:,.0f} "
+            f"± ${stats['avg_comp_error']:,.0f}, refining...")
+
+    map_fig = create_map_chart(location_averages(sample_df, weight='sample_weight')).to_dict()
+    return (
+        *map_update(map_fig, map_state, note),
+        mark_approximate(create_scatter_chart(sample_df), note),
+        mark_approximate(create_education_chart(education_distribution(sample_df)), note),
+        create_summary_cards(stats, fraction, data.percentiles(selected_range, selected_company, filters=filters)),
+        request
+    )
+
+def refine_selection(request):
+    if request is None:
+        return get_data().full_range, None, {}
+    return request["range"], request["company"], request.get("filters") or {}
 
-# Add new callbacks for each chart
 @app.callback(
-    Output("map-graph", "figure"),
-    [Input("timestamp-slider", "value"), Input("company-dropdown", "value")]
+    Output("summary-cards", "children"),
+    Input("refine-request", "data"),
+    prevent_initial_call=True
 )
-def update_map(selected_range, selected_company):
-    if selected_range is None:
-        selected_range = [0, (max_date - min_date).days]
-    
-    start_date = df['timestamp'].min() + pd.Timedelta(days=selected_range[0])
-    end_date = df['timestamp'].min() + pd.Timedelta(days=selected_range[1])
-    filtered_df = df[(df['timestamp'] >= start_date) & (df['timestamp'] <= end_date)]
-    
-    if selected_company:
-        if isinstance(selected_company, list):
-            company_df = filtered_df[filtered_df["company"].isin(selected_company)].copy()
-        else:
-            company_df = filtered_df[filtered_df["company"] == selected_company].copy()
-    else:
-        company_df = filtered_df.copy()
-    
-    grouped = company_df.groupby(['latitude', 'longitude'], as_index=False).agg(
-        avg_salary=('totalyearlycompensation', 'mean'),
-        location=('location', 'first')
+def update_dashboard(request):
+    selected_range, selected_company, filters = refine_selection(request)
+    data = get_data()
+    company_df = data.filter(selected_range, selected_company, filters)
+    return create_summary_cards(summary_stats(company_df),
+                                percentiles=data.percentiles(selected_range, selected_company, filters=filters))
+
+@app.callback(
+    [Output("map-graph", "figure"), Output("map-state", "data")],
+    Input("refine-request", "data"),
+    State("map-state", "data"),
+    prevent_initial_call=True
+)
+def update_map(request, map_state=None):
+    selected_range, selected_company, filters = refine_selection(request)
+    data = get_data()
+    map_fig = results.get_or_set(
+        result_key("map", selected_range, selected_company, filters=filters),
+        lambda: create_map_chart(location_averages(data.filter(selected_range, selected_company, filters))).to_dict()
     )
-    
-    return create_map_chart(grouped)
+    return map_update(map_fig, map_state)
 
 @app.callback(
     Output("bar-chart", "srcDoc"),
-    [Input("timestamp-slider", "value"), Input("company-dropdown", "value")]
+    [Input("timestamp-slider", "value"), Input("company-dropdown", "value"), Input("bar-statistic", "value"),
+     *FILTER_INPUTS]
 )
-def update_bar(selected_range, selected_company):
+def update_bar(selected_range, selected_company, statistic="median", level=None, title=None,
+               gender_category=None, education=None):
+    filters = selected_filters(level, title, gender_category, education)
+    data = get_data()
     if selected_range is None:
-        selected_range = [0, (max_date - min_date).days]
-        
-    start_date = df['timestamp'].min() + pd.Timedelta(days=selected_range[0])
-    end_date = df['timestamp'].min() + pd.Timedelta(days=selected_range[1])
-    filtered_df = df[(df['timestamp'] >= start_date) & (df['timestamp'] <= end_date)]
-    
-    if selected_company:
-        if isinstance(selected_company, list):
-            company_df = filtered_df[filtered_df["company"].isin(selected_company)].copy()
-        else:
-            company_df = filtered_df[filtered_df["company"] == selected_company].copy()
-    else:
-        company_df = filtered_df.copy()
-    
-    avg_salary_by_company = company_df.groupby('company')['totalyearlycompensation'].mean().reset_index()
-    top_10_companies = avg_salary_by_company.nlargest(10, 'totalyearlycompensation')
-    
-    return create_bar_chart(top_10_companies)
+        selected_range = data.full_range
+
+    def render():
+        if statistic == "median":
+            return create_bar_chart(data.median_top_companies(selected_range, selected_company, filters=filters),
+                                    title='Median Yearly Compensation ($)')
+        return create_bar_chart(top_companies(data.filter(selected_range, selected_company, filters)))
+
+    return results.get_or_set(result_key("bar", selected_range, selected_company, statistic, filters=filters), render)
 
 @app.callback(
     Output("pie-chart", "srcDoc"),
-    [Input("timestamp-slider", "value"), Input("company-dropdown", "value")]
+    [Input("timestamp-slider", "value"), Input("company-dropdown", "value"), *FILTER_INPUTS]
 )
-def update_pie(selected_range, selected_company):
+def update_pie(selected_range, selected_company, level=None, title=None, gender_category=None, education=None):
+    filters = selected_filters(level, title, gender_category, education)
+    data = get_data()
     if selected_range is None:
-        selected_range = [0, (max_date - min_date).days]
-        
-    start_date = df['timestamp'].min() + pd.Timedelta(days=selected_range[0])
-    end_date = df['timestamp'].min() + pd.Timedelta(days=selected_range[1])
-    filtered_df = df[(df['timestamp'] >= start_date) & (df['timestamp'] <= end_date)]
-    
-    if selected_company:
-        if isinstance(selected_company, list):
-            company_df = filtered_df[filtered_df["company"].isin(selected_company)].copy()
-        else:
-            company_df = filtered_df[filtered_df["company"] == selected_company].copy()
-    else:
-        company_df = filtered_df.copy()
-    
-    company_df['gender_category'] = company_df['gender'].dropna().map(
-        lambda x: 'male' if str(x).lower() in ['m', 'male'] 
-        else ('female' if str(x).lower() in ['f', 'female'] else 'other')
+        selected_range = data.full_range
+    return results.get_or_set(
+        result_key("pie", selected_range, selected_company, filters=filters),
+        lambda: create_pie_chart(gender_counts(data.filter(selected_range, selected_company, filters)))
     )
-    gender_counts = company_df['gender_category'].value_counts().reset_index()
-    gender_counts.columns = ['gender', 'count']
-    
-    return create_pie_chart(gender_counts)
 
 @app.callback(
     Output("scatter-graph", "figure"),
-    [Input("timestamp-slider", "value"), Input("company-dropdown", "value")]
+    Input("refine-request", "data"),
+    prevent_initial_call=True
 )
-def update_scatter(selected_range, selected_company):
-    if selected_range is None:
-        selected_range = [0, (max_date - min_date).days]
-        
-    start_date = df['timestamp'].min() + pd.Timedelta(days=selected_range[0])
-    end_date = df['timestamp'].min() + pd.Timedelta(days=selected_range[1])
-    filtered_df = df[(df['timestamp'] >= start_date) & (df['timestamp'] <= end_date)]
-    
-    if selected_company:
-        if isinstance(selected_company, list):
-            company_df = filtered_df[filtered_df["company"].isin(selected_company)].copy()
-        else:
-            company_df = filtered_df[filtered_df["company"] == selected_company].copy()
-    else:
-        company_df = filtered_df.copy()
-    
-    return create_scatter_chart(company_df)
+def update_scatter(request):
+    selected_range, selected_company, filters = refine_selection(request)
+    data = get_data()
+    # Full-row figures run to megabytes, so only batch-rendered ones are cached
+    return (results.get(result_key("scatter", selected_range, selected_company, filters=filters))
+            or create_scatter_chart(data.filter(selected_range, selected_company, filters)))
 
 @app.callback(
     Output("education-boxplot", "figure"),
-    [Input("timestamp-slider", "value"), Input("company-dropdown", "value")]
+    Input("refine-request", "data"),
+    prevent_initial_call=True
 )
-def update_education(selected_range, selected_company):
+def update_education(request):
+    selected_range, selected_company, filters = refine_selection(request)
+    data = get_data()
+    return (results.get(result_key("education", selected_range, selected_company, filters=filters))
+            or create_education_chart(education_distribution(data.filter(selected_range, selected_company, filters))))
+
+# Served from the monthly rollups built at ingest, never from a row scan
+@app.callback(
+    Output("trend-graph", "figure"),
+    [Input("timestamp-slider", "value"), Input("company-dropdown", "value"), Input("trend-window", "value"),
+     *FILTER_INPUTS]
+)
+def update_trend(selected_range, selected_company, window=3, level=None, title=None,
+                 gender_category=None, education=None):
+    filters = selected_filters(level, title, gender_category, education)
+    data = get_data()
     if selected_range is None:
-        selected_range = [0, (max_date - min_date).days]
-        
-    start_date = df['timestamp'].min() + pd.Timedelta(days=selected_range[0])
-    end_date = df['timestamp'].min() + pd.Timedelta(days=selected_range[1])
-    filtered_df = df[(df['timestamp'] >= start_date) & (df['timestamp'] <= end_date)]
-    
-    if selected_company:
-        if isinstance(selected_company, list):
-            company_df = filtered_df[filtered_df["company"].isin(selected_company)].copy()
-        else:
-            company_df = filtered_df[filtered_df["company"] == selected_company].copy()
-    else:
-        company_df = filtered_df.copy()
-    
-    education_df = company_df.melt(
-        id_vars=['totalyearlycompensation'],
-        value_vars=['Highschool', 'Bachelors_Degree', 'Masters_Degree', 'Doctorate_Degree'],
-        var_name='Education_Level',
-        value_name='Degree'
+        selected_range = data.full_range
+    return results.get_or_set(
+        result_key("trend", selected_range, selected_company, window, filters=filters),
+        lambda: create_trend_chart(data.trend(selected_range, selected_company, window, filters), window)
     )
-    education_df = education_df[education_df['Degree'] == 1]
-    education_df['Education_Level'] = education_df['Education_Level'].replace({
-        'Highschool': 'Highschool',
-        'Bachelors_Degree': 'Bachelors',
-        'Masters_Degree': 'Masters',
-        'Doctorate_Degree': 'Doctorate'
-    })
-    
-    return create_education_chart(education_df)
 
 if __name__ == '__main__':
     app.run_server(debug=True, port=8052)
\ No newline at end of file
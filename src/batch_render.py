@@ -0,0 +1,111 @@
+"""Render the dashboard's figures headlessly for a grid of filter states.
+
+The grid is every calendar year in the data (plus the full range) crossed
+with "all companies" and each of the top-N companies by response count.
+States are rendered in parallel across a process pool. Plotly figures are
+written as JSON, and with ``--html`` also as standalone HTML. The Altair
+charts are written as HTML. A ``manifest.json`` lets the app load the output
+into its result cache at startup::
+
+    python src/batch_render.py --top-n 10 --out data/processed/rendered
+    WARM_CACHE_DIR=data/processed/rendered python src/app.py
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import re
+
+import pandas as pd
+
+from aggregates import location_averages, gender_counts, education_distribution
+from cache import MANIFEST
+from charts import (create_map_chart, create_bar_chart, create_pie_chart, create_scatter_chart,
+                    create_education_chart)
+from data import get_data
+
+def yearly_ranges(data):
+    """Slider ranges for the full period and for each calendar year."""
+    ranges = {'all': data.full_range}
+    for year in range(data.min_date.year, data.max_date.year + 1):
+        start = max(0, (pd.Timestamp(year=year, month=1, day=1) - data.min_date).days)
+        end = min(data.days, (pd.Timestamp(year=year, month=12, day=31) - data.min_date).days)
+        ranges[str(year)] = [start, end]
+    return ranges
+
+def company_selections(data, top_n):
+    selections = {'all': None}
+    counts = data.df.loc[data.df['company_id'] >= 0, 'company_id'].value_counts()
+    for company_id in counts.index[:top_n]:
+        name = data.company_names[company_id]
+        selections[re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')] = [int(company_id)]
+    return selections
+
+def render_state(state):
+    """Render every figure for one filter state. Runs in a pool worker."""
+    range_label, selected_range, company_label, selected_company, out_dir, write_html = state
+    data = get_data()
+    company_df = data.filter(selected_range, selected_company)
+
+    figures = {
+        'map': create_map_chart(location_averages(company_df)),
+        'scatter': create_scatter_chart(company_df),
+        'education': create_education_chart(education_distribution(company_df))
+    }
+    documents = {
+        'bar': create_bar_chart(data.median_top_companies(selected_range, selected_company),
+                                title='Median Yearly Compensation ($)'),
+        'pie': create_pie_chart(gender_counts(company_df))
+    }
+
+    state_dir = os.path.join(range_label, company_label)
+    os.makedirs(os.path.join(out_dir, state_dir), exist_ok=True)
+    entries = []
+    for name, fig in figures.items():
+        file = os.path.join(state_dir, f'{name}.json')
+        with open(os.path.join(out_dir, file), 'w') as f:
+            f.write(fig.to_json())
+        if write_html:
+            fig.write_html(os.path.join(out_dir, state_dir, f'{name}.html'))
+        entries.append({'name': name, 'range': selected_range, 'company': selected_company, 'file': file})
+    for name, html in documents.items():
+        file = os.path.join(state_dir, f'{name}.html')
+        with open(os.path.join(out_dir, file), 'w') as f:
+            f.write(html)
+        # The bar chart's cache key carries the statistic it was ranked by
+        extra = ['median'] if name == 'bar' else []
+        entries.append({'name': name, 'range': selected_range, 'company': selected_company,
+                        'file': file, 'extra': extra})
+    return entries
+
+def render_grid(out_dir, top_n=10, processes=4, write_html=False):
+    # Load once in the parent so forked workers share the loaded frame
+    data = get_data()
+    states = [
+        (range_label, selected_range, company_label, selected_company, out_dir, write_html)
+        for range_label, selected_range in yearly_ranges(data).items()
+        for company_label, selected_company in company_selections(data, top_n).items()
+    ]
+
+    os.makedirs(out_dir, exist_ok=True)
+    pool = mp.Pool(processes=processes)
+    entries = []
+    for state_entries in pool.imap_unordered(render_state, states):
+        entries.extend(state_entries)
+    pool.close()
+    pool.join()
+
+    with open(os.path.join(out_dir, MANIFEST), 'w') as f:
+        json.dump({'version': data.version, 'entries': entries}, f, indent=1)
+    return len(states), len(entries)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--out', default='data/processed/rendered', help='output directory')
+    parser.add_argument('--top-n', type=int, default=10, help='number of companies to render individually')
+    parser.add_argument('--processes', type=int, default=4, help='size of the worker pool')
+    parser.add_argument('--html', action='store_true', help='also write standalone HTML for plotly figures')
+    args = parser.parse_args()
+
+    n_states, n_files = render_grid(args.out, args.top_n, args.processes, args.html)
+    print(f"Rendered {n_states} filter states ({n_files} figures) to {args.out}")
@@ -0,0 +1,110 @@
+"""Per-value row indexes for the categorical filters.
+
+Rows are stored in timestamp order, so a date range is a contiguous slice of
+row ids found by binary search. Every distinct value of an indexed column
+keeps the ids of its rows in whichever container is smaller: a sorted
+``int32`` array for rare values, or a packed bitmap (one bit per row) for
+common ones. A query ORs the containers of the selected values within each
+column and ANDs the columns, starting from the smallest, so its cost follows
+the size of the result rather than the table.
+
+``python src/check_bitmaps.py`` checks selections against ``filter_data``.
+"""
+import numpy as np
+import pandas as pd
+
+def group_ids(values):
+    """``{value: sorted row ids}`` for one column; missing values are skipped."""
+    codes, uniques = pd.factorize(values)
+    order = np.argsort(codes, kind='stable').astype(np.int32)
+    bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+    return {value: order[bounds[i]:bounds[i + 1]] for i, value in enumerate(uniques)}
+
+class BitmapIndex:
+
+    def __init__(self, columns, n_rows):
+        """``columns`` maps a dimension name to ``{value: sorted row ids}``."""
+        self.n_rows = n_rows
+        self.containers = {
+            dimension: {value: self._container(ids) for value, ids in values.items()}
+            for dimension, values in columns.items()
+        }
+
+    def _container(self, ids):
+        ids = np.asarray(ids, dtype=np.int32)
+        # An id costs 4 bytes, a bitmap 1 bit per row
+        if len(ids) * 32 < self.n_rows:
+            return ids, len(ids), False
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[ids] = True
+        return np.packbits(mask), len(ids), True
+
+    def values(self, dimension):
+        return list(self.containers[dimension])
+
+    def select(self, start, stop, filters):
+        """Row ids in ``[start, stop)`` matching every ``{dimension: [values]}`` filter.
+
+        Returns a slice when no filter applies.
+        """
+        if not filters:
+            return slice(start, stop)
+        if start >= stop:
+            return np.array([], dtype=np.int32)
+
+        unions = sorted(
+            (self._union(dimension, values, start, stop) for dimension, values in filters.items()),
+            key=lambda union: union[1]
+        )
+        sparse = [ids for ids, _, dense in unions if not dense]
+        dense = [bits for bits, _, dense in unions if dense]
+        if not sparse:
+            return self._ids(np.bitwise_and.reduce(dense), start)
+
+        ids = sparse[0]
+        for other in sparse[1:]:
+            ids = _intersect(ids, other)
+        for bits in dense:
+            ids = ids[_test(bits, ids - (start & ~7))]
+        return ids
+
+    def _union(self, dimension, values, start, stop):
+        """OR one dimension's selected values, clipped to ``[start, stop)``.
+
+        Returns ``(container, estimated size, is_dense)``; dense unions are
+        packed bytes covering the range from ``start`` rounded down to a byte.
+        """
+        containers = [self.containers[dimension][value] for value in values
+                      if value in self.containers[dimension]]
+        arrays = [ids[np.searchsorted(ids, start):np.searchsorted(ids, stop)]
+                  for ids, _, dense in containers if not dense]
+        bitmaps = [bits for bits, _, dense in containers if dense]
+        if not bitmaps:
+            ids = np.unique(np.concatenate(arrays)) if arrays else np.array([], dtype=np.int32)
+            return ids, len(ids), False
+
+        bits = np.bitwise_or.reduce([b[start >> 3:(stop + 7) >> 3] for b in bitmaps])
+        bits[0] &= 0xFF >> (start & 7)
+        if stop & 7:
+            bits[-1] &= (0xFF << (8 - (stop & 7))) & 0xFF
+        for ids in arrays:
+            ids = ids - (start & ~7)
+            np.bitwise_or.at(bits, ids >> 3, (0x80 >> (ids & 7)).astype(np.uint8))
+        estimate = sum(count for _, count, _ in containers) * (stop - start) / self.n_rows
+        return bits, estimate, True
+
+    @staticmethod
+    def _ids(bits, start):
+        return (np.flatnonzero(np.unpackbits(bits)) + (start & ~7)).astype(np.int32)
+
+def _intersect(a, b):
+    # Probe the smaller sorted array into the larger one
+    if len(a) > len(b):
+        a, b = b, a
+    if len(a) == 0:
+        return a
+    positions = np.minimum(np.searchsorted(b, a), len(b) - 1)
+    return a[b[positions] == a]
+
+def _test(bits, offsets):
+    return (bits[offsets >> 3] & (0x80 >> (offsets & 7))) != 0
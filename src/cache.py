@@ -0,0 +1,120 @@
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+from plotly.utils import PlotlyJSONEncoder
+
+MANIFEST = 'manifest.json'
+
+logger = logging.getLogger(__name__)
+
+def result_key(name, selected_range, selected_company, *extra, filters=None):
+    """Cache key for one rendered output under a filter state.
+
+    Company selections are order-insensitive, so they are normalised to a
+    sorted tuple; a single company and a one-item list share a key. The other
+    categorical ``filters`` are normalised the same way and only extend the
+    key when one is set, so unfiltered keys match the batch-rendered ones.
+    """
+    if not selected_company:
+        companies = ()
+    elif isinstance(selected_company, list):
+        companies = tuple(sorted(selected_company))
+    else:
+        companies = (selected_company,)
+    key = (name, tuple(selected_range), companies) + tuple(extra)
+    active = tuple(
+        (dimension, tuple(sorted([values] if isinstance(values, str) else values)))
+        for dimension, values in sorted((filters or {}).items()) if values
+    )
+    return key + (('filters', active),) if active else key
+
+def result_size(value):
+    """Approximate size in bytes of a result as sent to the browser."""
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    return len(json.dumps(value, cls=PlotlyJSONEncoder))
+
+class ResultCache:
+    """Thread-safe LRU of rendered callback results keyed on filter state.
+
+    Bounded both by entry count and, when ``maxbytes`` is set, by the total
+    size of the results; a result larger than the whole budget is returned
+    without being stored.
+    """
+
+    def __init__(self, maxsize=256, maxbytes=None):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.nbytes = 0
+        self._items = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._items:
+                return None
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def set(self, key, value, size=None):
+        if size is None:
+            size = result_size(value) if self.maxbytes is not None else 0
+        with self._lock:
+            if self.maxbytes is not None and size > self.maxbytes:
+                return value
+            if key in self._items:
+                self.nbytes -= self._sizes[key]
+            self._items[key] = value
+            self._sizes[key] = size
+            self.nbytes += size
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize or (self.maxbytes is not None and self.nbytes > self.maxbytes):
+                evicted, _ = self._items.popitem(last=False)
+                self.nbytes -= self._sizes.pop(evicted)
+        return value
+
+    def get_or_set(self, key, compute):
+        value = self.get(key)
+        if value is None:
+            value = self.set(key, compute())
+        return value
+
+    def load_dir(self, path, version=None):
+        """Pre-populate from a directory written by ``batch_render.py``.
+
+        Output rendered from a different dataset version is ignored. The
+        entry limit grows to fit the manifest, so the configured size stays
+        free for live results; entries that do not fit the byte budget are
+        dropped with a warning. Returns the number of entries kept.
+        """
+        with open(os.path.join(path, MANIFEST)) as f:
+            manifest = json.load(f)
+        if version is not None and manifest.get('version') != version:
+            return 0
+        entries = manifest['entries']
+        self.maxsize += len(entries)
+        keys = []
+        for entry in entries:
+            file = os.path.join(path, entry['file'])
+            with open(file) as f:
+                value = json.load(f) if entry['file'].endswith('.json') else f.read()
+            key = result_key(entry['name'], entry['range'], entry['company'], *entry.get('extra', []))
+            self.set(key, value, os.path.getsize(file))
+            keys.append(key)
+        keys = set(keys)
+        kept = sum(key in self for key in keys)
+        if kept < len(keys):
+            logger.warning("kept %d of %d warm cache entries from %s within the %s byte budget",
+                           kept, len(keys), path, self.maxbytes)
+        return kept
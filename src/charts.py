@@ -0,0 +1,195 @@
+import json
+from functools import lru_cache
+
+from aggregates import location_averages, top_companies, gender_counts, education_distribution
+
+# The charting libraries are imported on first use to keep app import fast
+@lru_cache(maxsize=None)
+def altair():
+    import altair as alt
+    alt.data_transformers.disable_max_rows()
+    return alt
+
+def create_map_chart(grouped):
+    import plotly.express as px
+    map_fig = px.scatter_mapbox(
+        grouped,
+        lat="latitude",
+        lon="longitude",
+        size="avg_salary",
+        color="avg_salary",
+        hover_name="location",
+        hover_data={"avg_salary": ":.2f"},
+        color_continuous_scale="Viridis",
+        size_max=15,
+        zoom=1.5,
+        center={"lat": 20, "lon": 0},
+        opacity=0.6
+    )
+    map_fig.update_layout(
+        mapbox_style="open-street-map",
+        margin={"r":0, "t":0, "l":0, "b":0},
+        # Keep the user's pan/zoom when markers are patched in place
+        uirevision="map"
+    )
+    return map_fig
+
+def create_bar_chart(top_10_companies, title='Average Yearly Compensation ($)'):
+    alt = altair()
+    bar_chart = alt.Chart(top_10_companies).mark_bar().encode(
+        x=alt.X('company:N', sort='-y', axis=alt.Axis(labelAngle=-45)),
+        y=alt.Y('totalyearlycompensation:Q', title=title),
+        color=alt.Color('totalyearlycompensation:Q', 
+                    scale=alt.Scale(
+                        domain=[top_10_companies['totalyearlycompensation'].min(), 
+                                top_10_companies['totalyearlycompensation'].max()],
+                        range=['#ADD8E6', '#00008B']
+                    ),legend=None
+                    )
+    ).properties(
+        width=200,
+        height=180
+    )
+    return bar_chart.to_html()
+
+def create_pie_chart(gender_counts):
+    alt = altair()
+    pie_chart = alt.Chart(gender_counts).mark_arc().encode(
+        theta='count:Q',
+        color=alt.Color('gender:N', scale=alt.Scale(domain=['male', 'female', 'other'])),
+        tooltip=['gender:N', 'count:Q']
+    ).properties(
+        width=180,
+        height=180
+    )
+    return pie_chart.to_html()
+
+def create_scatter_chart(company_df):
+    import plotly.express as px
+    scatter_fig = px.scatter(
+        company_df,
+        x="yearsofexperience",
+        y="totalyearlycompensation",
+        color="level",
+        hover_data=["title", "basesalary", "stockgrantvalue", "bonus", "location"]
+    )
+    scatter_fig.update_layout(
+        xaxis_title="Years of Experience", 
+        yaxis_title="Total Compensation"
+    )
+    return scatter_fig
+
+def create_education_chart(education_df):
+    import plotly.express as px
+    violin_fig = px.violin(
+        education_df,
+        x="Education_Level",
+        y="totalyearlycompensation",
+        box=True,
+        points="all",
+        labels={"totalyearlycompensation": "Total Yearly Compensation ($)", "Education_Level": "Education Level"}
+    )
+    violin_fig.update_layout(
+        yaxis_title="Total Yearly Compensation ($)",
+        xaxis_title="Education Level"
+    )
+    return violin_fig
+
+def create_trend_chart(trend_df, window=3):
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    trend_fig = make_subplots(specs=[[{"secondary_y": True}]])
+    trend_fig.add_trace(
+        go.Bar(x=trend_df["month"], y=trend_df["responses"], name="Responses",
+               marker_color="#ADD8E6", opacity=0.6),
+        secondary_y=True
+    )
+    for column, name, color, dash in [
+        ("mean", "Mean", "#4682B4", "solid"),
+        ("median", "Median", "#00008B", "solid"),
+        ("rolling_mean", f"Mean ({window}-month rolling)", "#4682B4", "dash"),
+        ("rolling_median", f"Median ({window}-month rolling)", "#00008B", "dash")
+    ]:
+        trend_fig.add_trace(
+            go.Scatter(x=trend_df["month"], y=trend_df[column], name=name, mode="lines",
+                       line={"color": color, "dash": dash}),
+            secondary_y=False
+        )
+    trend_fig.update_layout(
+        xaxis_title="Month",
+        legend={"orientation": "h", "y": -0.2},
+        hovermode="x unified"
+    )
+    trend_fig.update_yaxes(title_text="Total Yearly Compensation ($)", secondary_y=False)
+    trend_fig.update_yaxes(title_text="Responses", secondary_y=True, showgrid=False)
+    return trend_fig
+
+def apply_chart_creation(func_data_tuple):
+    func, data = func_data_tuple
+    return func(data)
+
+def process_charts(company_df):
+    import multiprocessing as mp
+
+    # Create a pool of workers
+    pool = mp.Pool(processes=4)
+    
+    # Prepare data for parallel processing
+    grouped = location_averages(company_df)
+    top_10_companies = top_companies(company_df)
+    gender_df = gender_counts(company_df)
+    education_df = education_distribution(company_df)
+    
+    # Run chart creation in parallel
+    results = pool.map(
+        apply_chart_creation,
+        [
+            (create_map_chart, grouped),
+            (create_bar_chart, top_10_companies),
+            (create_pie_chart, gender_df),
+            (create_scatter_chart, company_df),
+            (create_education_chart, education_df)
+        ]
+    )
+    
+    pool.close()
+    pool.join()
+    
+    return results
+
+def approximate_annotation(note):
+    return dict(
+        text=note,
+        xref="paper", yref="paper",
+        x=0.01, y=0.99,
+        xanchor="left", yanchor="top",
+        showarrow=False,
+        bgcolor="rgba(255, 255, 255, 0.8)",
+        font={"color": "#B22222"}
+    )
+
+def mark_approximate(fig, note):
+    fig.add_annotation(**approximate_annotation(note))
+    return fig
+
+# Marker arrays of the map trace that change with the selection
+MAP_TRACE_FIELDS = [
+    ("lat",), ("lon",), ("hovertext",), ("customdata",),
+    ("marker", "size"), ("marker", "color"), ("marker", "sizeref")
+]
+
+def map_trace_values(fig):
+    trace = fig["data"][0]
+    values = []
+    for path in MAP_TRACE_FIELDS:
+        value = trace
+        for key in path:
+            value = value.get(key) if value is not None else None
+        values.append(value)
+    return values
+
+def map_signature(fig):
+    import hashlib
+    from plotly.utils import PlotlyJSONEncoder
+    encoded = json.dumps(map_trace_values(fig), cls=PlotlyJSONEncoder)
+    return hashlib.sha1(encoded.encode()).hexdigest()
@@ -0,0 +1,58 @@
+"""Equivalence check for the bitmap-indexed row selection.
+
+Compares ``DashboardData.filter`` (timestamp slice plus ``BitmapIndex``)
+with the plain pandas masks of ``aggregates.filter_data`` on random date
+ranges, company selections and categorical filters, and stops at the first
+selection where they differ. Run it from the repository root after touching
+bitmaps.py, data.py or the filters::
+
+    python src/check_bitmaps.py [--cases 300] [--seed 0]
+"""
+import argparse
+import random
+
+from aggregates import EDUCATION_LEVELS, FILTER_DIMENSIONS, filter_data
+from data import get_data
+
+def random_selection(data, rng):
+    """One ``(selected_range, selected_company, filters)`` case."""
+    start = rng.randint(0, data.days)
+    selected_range = rng.choice([data.full_range, [start, rng.randint(start, data.days)], [start, start]])
+
+    company_ids = data.index.values('company')
+    selected_company = rng.choice([
+        None,
+        rng.choice(company_ids),
+        rng.sample(company_ids, min(len(company_ids), rng.randint(1, 4)))
+    ])
+
+    filters = {}
+    for dimension in FILTER_DIMENSIONS:
+        if rng.random() < 0.4:
+            values = list(EDUCATION_LEVELS.values()) if dimension == 'education' else data.index.values(dimension)
+            # An unknown value must select nothing on both paths
+            filters[dimension] = rng.sample(values, min(len(values), rng.randint(1, 3)))
+            if rng.random() < 0.1:
+                filters[dimension].append('not-a-value')
+    return selected_range, selected_company, filters
+
+def check(cases=300, seed=0):
+    data = get_data()
+    rng = random.Random(seed)
+    for case in range(cases):
+        selected_range, selected_company, filters = random_selection(data, rng)
+        indexed = data.filter(selected_range, selected_company, filters)
+        expected = filter_data(data.df, selected_range, selected_company, data.min_date, filters)
+        if not indexed.index.equals(expected.index):
+            raise AssertionError(
+                f"case {case}: range={selected_range} company={selected_company} filters={filters}: "
+                f"bitmap index selected {len(indexed)} rows, filter_data {len(expected)}"
+            )
+    return cases
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Check the bitmap index against filter_data.")
+    parser.add_argument('--cases', type=int, default=300, help='random selections to compare')
+    parser.add_argument('--seed', type=int, default=0, help='seed for the selections')
+    args = parser.parse_args()
+    print(f"{check(args.cases, args.seed)} selections match filter_data")
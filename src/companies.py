@@ -0,0 +1,178 @@
+"""Canonical company ids for the free-text ``company`` column.
+
+The export spells one employer many ways ("Google", "google ", "Google Inc.",
+"Google LLC"). Ingestion maps every raw spelling to a dense canonical id in
+two steps:
+
+1. a vectorized normalizer (case, dotted initials, "&", punctuation,
+   whitespace and trailing legal suffixes), run once per distinct raw
+   string and memoized;
+2. the reviewed alias table ``data/processed/company_aliases.csv``, whose
+   ``alias,canonical`` rows fold one normalized name into another (e.g.
+   ``Facebook,Meta``).
+
+Run ``python src/companies.py`` from the repository root to propose further
+merges. Names are blocked on their first characters and only compared with
+difflib inside a block; proposals are written for review, and accepted rows
+are copied into the alias table.
+"""
+import argparse
+import difflib
+import os
+from collections import Counter, defaultdict
+
+import numpy as np
+import pandas as pd
+
+ALIASES_PATH = 'data/processed/company_aliases.csv'
+PROPOSALS_PATH = 'data/processed/company_alias_proposals.csv'
+
+LEGAL_SUFFIXES = ['inc', 'incorporated', 'llc', 'llp', 'lp', 'ltd', 'limited', 'corp', 'corporation',
+                  'co', 'company', 'plc', 'gmbh', 'ag', 'sa', 'pvt', 'private', 'com']
+# Only trailing suffixes after another word, so "Co" alone stays "co"; an
+# "and" (from "&") right before them goes too, as in "Chase & Co."
+SUFFIX_PATTERN = r'(?:\s+and)?(?:\s+(?:' + '|'.join(LEGAL_SUFFIXES) + r'))+$'
+# Periods between single letters, so "A.T.&T." and "J.P." read as "AT&T" and "JP"
+INITIALS_PATTERN = r'(?<=\b\w)\.(?=\w\b)'
+# Bump when the keys change, since company ids (and everything keyed on them) follow
+KEY_VERSION = 2
+
+def normalize(names):
+    """Normalized key for each raw name in a Series of strings."""
+    lowered = names.str.lower().str.strip()
+    keys = (lowered
+            .str.replace(INITIALS_PATTERN, '', regex=True)
+            .str.replace('&', ' and ', regex=False)
+            .str.replace(r'[^\w\s]', ' ', regex=True)
+            .str.replace(r'\s+', ' ', regex=True)
+            .str.strip()
+            .str.replace(SUFFIX_PATTERN, '', regex=True))
+    # Names made only of punctuation keep their lowered form
+    return keys.where(keys != '', lowered)
+
+class CompanyCanonicalizer:
+    """Maps raw company spellings to dense canonical ids.
+
+    Ids are assigned in first-seen order, so the same file and alias table
+    always produce the same ids. Each distinct raw string is normalized once.
+    """
+
+    def __init__(self, aliases=()):
+        aliases = list(aliases)
+        if aliases:
+            alias, canonical = zip(*aliases)
+            aliases = zip(normalize(pd.Series(alias, dtype=object)),
+                          normalize(pd.Series(canonical, dtype=object)))
+        self.aliases = {alias: canonical for alias, canonical in aliases if alias != canonical}
+        self.keys = []
+        self.key_ids = {}
+        self.raw_ids = {}
+        self.spellings = []
+
+    @classmethod
+    def load(cls, path=ALIASES_PATH):
+        if not os.path.exists(path):
+            return cls()
+        table = pd.read_csv(path, dtype=str).dropna()
+        return cls(zip(table['alias'], table['canonical']))
+
+    def _resolve(self, key):
+        seen = set()
+        while key in self.aliases and key not in seen:
+            seen.add(key)
+            key = self.aliases[key]
+        return key
+
+    def _key_id(self, key):
+        key = self._resolve(key)
+        if key not in self.key_ids:
+            self.key_ids[key] = len(self.keys)
+            self.keys.append(key)
+            self.spellings.append(Counter())
+        return self.key_ids[key]
+
+    def encode(self, raw):
+        """Canonical id for each value of a raw ``company`` Series, -1 where missing."""
+        codes, uniques = pd.factorize(raw)
+        unseen = [name for name in uniques if name not in self.raw_ids]
+        if unseen:
+            for name, key in zip(unseen, normalize(pd.Series(unseen, dtype=object))):
+                self.raw_ids[name] = self._key_id(key)
+
+        unique_ids = np.array([self.raw_ids[name] for name in uniques], dtype=np.int32)
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        for name, company_id, count in zip(uniques, unique_ids, counts):
+            self.spellings[company_id][name] += int(count)
+        return np.append(unique_ids, np.int32(-1))[codes]
+
+    def names(self):
+        """Display name per id: the company's most common raw spelling."""
+        return np.array([spellings.most_common(1)[0][0].strip() for spellings in self.spellings], dtype=object)
+
+    def display(self, ids):
+        """Display names for an array of ids, NaN where the id is -1."""
+        return np.append(self.names(), np.nan)[ids]
+
+    def canonical_keys(self, names):
+        """Normalized key of each raw or display spelling, with the alias table applied."""
+        return [self._resolve(key) for key in normalize(pd.Series(list(names), dtype=object))]
+
+    def lookup(self, names):
+        """Ids for raw or display spellings; None for companies not in the data."""
+        ids = []
+        for name in names:
+            if name in self.raw_ids:
+                ids.append(self.raw_ids[name])
+            else:
+                key = self._resolve(normalize(pd.Series([name], dtype=object))[0])
+                ids.append(self.key_ids.get(key))
+        return ids
+
+    def propose_merges(self, min_score=0.9, prefix=3):
+        """Candidate alias rows for review, best first.
+
+        Only companies whose keys share the first ``prefix`` characters
+        (spaces ignored) are compared. The smaller company of each pair is
+        proposed as the alias of the larger one.
+        """
+        names = self.names()
+        sizes = np.array([sum(spellings.values()) for spellings in self.spellings])
+        compact = [key.replace(' ', '') for key in self.keys]
+        blocks = defaultdict(list)
+        for company_id, key in enumerate(compact):
+            blocks[key[:prefix]].append(company_id)
+
+        matcher = difflib.SequenceMatcher(autojunk=False)
+        rows = []
+        for block in blocks.values():
+            for i, a in enumerate(block):
+                matcher.set_seq2(compact[a])
+                for b in block[i + 1:]:
+                    matcher.set_seq1(compact[b])
+                    if matcher.real_quick_ratio() < min_score or matcher.quick_ratio() < min_score:
+                        continue
+                    score = matcher.ratio()
+                    if score >= min_score:
+                        alias, canonical = (a, b) if sizes[a] < sizes[b] else (b, a)
+                        rows.append((names[alias], names[canonical], round(score, 3),
+                                     sizes[alias], sizes[canonical]))
+        proposals = pd.DataFrame(rows, columns=['alias', 'canonical', 'score', 'alias_rows', 'canonical_rows'])
+        return proposals.sort_values(['score', 'canonical_rows'], ascending=False, ignore_index=True)
+
+if __name__ == '__main__':
+    from data import DATA_PATH
+    from ingest import read_salaries
+
+    parser = argparse.ArgumentParser(description="Propose company alias merges for review.")
+    parser.add_argument('--min-score', type=float, default=0.9, help='difflib similarity needed to propose a merge')
+    parser.add_argument('--prefix', type=int, default=3, help='characters a pair must share to be compared')
+    parser.add_argument('--out', default=PROPOSALS_PATH, help='where to write the proposals')
+    args = parser.parse_args()
+
+    companies = CompanyCanonicalizer.load()
+    read_salaries(DATA_PATH, companies=companies)
+    proposals = companies.propose_merges(args.min_score, args.prefix)
+    proposals.to_csv(args.out, index=False)
+    print(f"{len(companies.raw_ids)} raw spellings -> {len(companies.keys)} companies; "
+          f"wrote {len(proposals)} proposed merges to {args.out}")
+    print(f"Copy accepted alias,canonical rows into {ALIASES_PATH} and re-run the dashboard.")
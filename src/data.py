@@ -0,0 +1,139 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from aggregates import EDUCATION_LEVELS, active_filters, gender_categories, selection_dates
+from bitmaps import BitmapIndex, group_ids
+from companies import ALIASES_PATH, KEY_VERSION, CompanyCanonicalizer
+from ingest import read_salaries
+from rollups import MonthlyRollups
+from sampling import build_samples
+from sketches import SalarySketches
+
+DATA_PATH = 'data/processed/your_output_file.csv'
+
+def load_data(path=DATA_PATH):
+    df, _ = read_salaries(path)
+    return df
+
+def dataset_version(path=DATA_PATH, aliases_path=ALIASES_PATH):
+    # Cheap fingerprint of the source file, the company key rules and the
+    # alias table, used to invalidate derived files
+    stat = os.stat(path)
+    version = f"{stat.st_size:x}-{stat.st_mtime_ns:x}-k{KEY_VERSION}"
+    if os.path.exists(aliases_path):
+        stat = os.stat(aliases_path)
+        version += f"-{stat.st_size:x}-{stat.st_mtime_ns:x}"
+    return version
+
+def build_index(df):
+    columns = {dimension: group_ids(df[dimension]) for dimension in ('level', 'title', 'gender_category')}
+    columns['company'] = group_ids(df['company_id'])
+    columns['company'].pop(-1, None)
+    columns['education'] = {level: np.flatnonzero(df[column].to_numpy() == 1)
+                            for column, level in EDUCATION_LEVELS.items()}
+    return BitmapIndex(columns, len(df))
+
+class DashboardData:
+    """The loaded dataset plus everything derived from it at load time."""
+
+    def __init__(self, df, version=None, ingest_report=None, rollups=None, companies=None):
+        # Timestamp order turns a date range into a contiguous block of rows
+        self.df = df = df.sort_values('timestamp', kind='stable', ignore_index=True)
+        self.version = version
+        self.ingest_report = ingest_report
+        # Rollups built during ingest must come with the canonicalizer that assigned their ids
+        if companies is None:
+            companies = CompanyCanonicalizer.load()
+            df['company_id'] = companies.encode(df['company'])
+        self.companies = companies
+        self.company_names = companies.names()
+        if rollups is None:
+            rollups = MonthlyRollups()
+            rollups.update(df)
+        self.rollups = rollups
+        self.min_date = df['timestamp'].min()
+        self.max_date = df['timestamp'].max()
+        self.days = (self.max_date - self.min_date).days
+        self.df['timestamp_numeric'] = (self.df['timestamp'] - self.min_date).dt.days
+        self.df['gender_category'] = gender_categories(self.df['gender'])
+        self.timestamps = self.df['timestamp'].to_numpy()
+        self.index = build_index(self.df)
+        self.samples = build_samples(self.df)
+        self.sketches = SalarySketches(self.df)
+
+    @property
+    def full_range(self):
+        return [0, self.days]
+
+    def rows(self, selected_range, selected_company, filters=None):
+        """Row ids (or a slice) of the selection, resolved on the bitmap index.
+
+        ``selected_company`` holds canonical company ids, as do the dropdown
+        values and cache keys.
+        """
+        start_date, end_date = selection_dates(selected_range, self.min_date)
+        start = np.searchsorted(self.timestamps, start_date.to_datetime64(), side='left')
+        stop = np.searchsorted(self.timestamps, end_date.to_datetime64(), side='right')
+        filters = active_filters(filters)
+        if selected_company:
+            filters['company'] = selected_company if isinstance(selected_company, list) else [selected_company]
+        return self.index.select(start, stop, filters)
+
+    def filter(self, selected_range, selected_company, filters=None):
+        return self.df.iloc[self.rows(selected_range, selected_company, filters)].copy()
+
+    # The sketches and rollups are per company x month, so the other filters
+    # are answered exactly from the selected rows instead
+
+    def percentiles(self, selected_range, selected_company, qs=(0.25, 0.5, 0.75, 0.9), filters=None):
+        if active_filters(filters):
+            company_df = self.filter(selected_range, selected_company, filters)
+            return {col: dict(zip(qs, company_df[col].quantile(list(qs)))) for col in self.sketches.columns}
+        start_date, end_date = selection_dates(selected_range, self.min_date)
+        return self.sketches.percentiles(start_date, end_date, selected_company, qs)
+
+    def trend(self, selected_range, selected_company, window=3, filters=None):
+        start_date, end_date = selection_dates(selected_range, self.min_date)
+        rollups, sketches = self.rollups, self.sketches
+        if active_filters(filters):
+            # Same months as the unfiltered path: whole edge months, plus the
+            # months the first rolling window reaches back into
+            first = pd.Period(start_date, 'M') - (window - 1)
+            last = pd.Period(end_date, 'M')
+            day = pd.Timedelta(days=1)
+            months_range = [(first.start_time - self.min_date) / day, (last.end_time - self.min_date) / day]
+            company_df = self.filter(months_range, selected_company, filters)
+            rollups = MonthlyRollups()
+            rollups.update(company_df)
+            sketches = SalarySketches(company_df, [MonthlyRollups.COLUMN])
+        return rollups.trend(start_date, end_date, sketches, selected_company, window)
+
+    def median_top_companies(self, selected_range, selected_company, n=10, filters=None):
+        if active_filters(filters):
+            company_df = self.filter(selected_range, selected_company, filters)
+            medians = company_df.groupby('company_id')['totalyearlycompensation'].median()
+            top = medians[medians.index >= 0].nlargest(n)
+        else:
+            # Exact medians per company from the sketches' rank index, no row scan
+            start_date, end_date = selection_dates(selected_range, self.min_date)
+            top = self.sketches.company_quantiles('totalyearlycompensation', start_date, end_date,
+                                                  selected_company, n=n)
+        return pd.DataFrame({'company': self.company_names[top.index], 'totalyearlycompensation': top.to_numpy()})
+
+_data = None
+_data_lock = threading.Lock()
+
+def get_data():
+    """Load the dataset on first use and share it between callbacks."""
+    global _data
+    if _data is None:
+        with _data_lock:
+            if _data is None:
+                rollups = MonthlyRollups()
+                companies = CompanyCanonicalizer.load()
+                df, report = read_salaries(DATA_PATH, on_chunk=rollups.update, companies=companies)
+                _data = DashboardData(df, dataset_version(), report, rollups, companies)
+    return _data
@@ -0,0 +1,156 @@
+"""Schema-driven, chunked CSV ingestion with bounded memory.
+
+Only the columns the dashboard uses are read. The file is streamed in
+chunks; each chunk is coerced to the declared dtypes, filtered, and copied
+into preallocated column arrays. Peak memory is the final table plus one
+chunk, rather than several untyped copies of the whole export.
+
+Company spellings are canonicalized on the way in (see companies.py): every
+row gets a ``company_id`` and ``company`` holds the canonical display name.
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+
+from companies import CompanyCanonicalizer
+
+logger = logging.getLogger(__name__)
+
+# Columns the dashboard reads, with the dtype each is stored as
+SCHEMA = {
+    'timestamp': 'datetime64[ns]',
+    'company': object,
+    'level': object,
+    'title': object,
+    'location': object,
+    'gender': object,
+    'totalyearlycompensation': 'float64',
+    'yearsofexperience': 'float64',
+    'basesalary': 'float64',
+    'stockgrantvalue': 'float64',
+    'bonus': 'float64',
+    'latitude': 'float64',
+    'longitude': 'float64',
+    'Highschool': 'float32',
+    'Bachelors_Degree': 'float32',
+    'Masters_Degree': 'float32',
+    'Doctorate_Degree': 'float32'
+}
+NA_VALUES = ['NA']
+CHUNKSIZE = 50000
+
+class IngestReport:
+    """Row accounting for one ingestion run."""
+
+    def __init__(self):
+        self.rows_read = 0
+        self.rows_kept = 0
+        self.rejected = {}
+        self.coerced = {}
+        self.company_spellings = 0
+        self.companies = 0
+
+    def reject(self, reason, count):
+        if count:
+            self.rejected[reason] = self.rejected.get(reason, 0) + int(count)
+
+    def coerce(self, column, count):
+        if count:
+            self.coerced[column] = self.coerced.get(column, 0) + int(count)
+
+    def to_dict(self):
+        return {
+            'rows_read': self.rows_read,
+            'rows_kept': self.rows_kept,
+            'rejected': dict(self.rejected),
+            'coerced': dict(self.coerced),
+            'company_spellings': self.company_spellings,
+            'companies': self.companies
+        }
+
+    def __str__(self):
+        lines = [f"read {self.rows_read} rows, kept {self.rows_kept}"]
+        lines += [f"  rejected {count}: {reason}" for reason, count in self.rejected.items()]
+        lines += [f"  coerced {count} unparseable values to NA in {column}" for column, count in self.coerced.items()]
+        if self.company_spellings:
+            lines.append(f"  canonicalized {self.company_spellings} company spellings to {self.companies} companies")
+        return '\n'.join(lines)
+
+def count_lines(path, block=1 << 20):
+    # Upper bound on the number of records, used to size the column arrays
+    with open(path, 'rb') as f:
+        return sum(buf.count(b'\n') for buf in iter(lambda: f.read(block), b'')) + 1
+
+def coerce_chunk(chunk, report):
+    """Cast one raw chunk to SCHEMA and drop the rows the dashboard can't use.
+
+    Only values blanked in rows that are kept count as coerced; rejected
+    rows are reported once, under their rejection reason.
+    """
+    unparsed = {}
+    for column, dtype in SCHEMA.items():
+        raw = chunk[column]
+        if dtype == object:
+            continue
+        if column == 'timestamp':
+            parsed = pd.to_datetime(raw, errors='coerce')
+        else:
+            parsed = pd.to_numeric(raw, errors='coerce')
+        unparsed[column] = parsed.isna() & raw.notna()
+        chunk[column] = parsed.astype(dtype)
+
+    bad_timestamp = chunk['timestamp'].isna()
+    bad_comp = ~(chunk['totalyearlycompensation'] > 0)
+    report.reject("unparseable timestamp", bad_timestamp.sum())
+    report.reject("missing or non-positive totalyearlycompensation", (bad_comp & ~bad_timestamp).sum())
+    kept = ~(bad_timestamp | bad_comp)
+    for column, mask in unparsed.items():
+        report.coerce(column, (mask & kept).sum())
+    return chunk[kept]
+
+def read_salaries(path, chunksize=CHUNKSIZE, on_chunk=None, companies=None):
+    """Stream the salary export into a typed frame. Returns ``(df, report)``.
+
+    ``on_chunk`` is called with each cleaned chunk, so incremental structures
+    such as the monthly rollups are built during the same pass. Pass
+    ``companies`` to keep the canonicalizer that assigned the company ids.
+    """
+    if companies is None:
+        companies = CompanyCanonicalizer.load()
+    capacity = max(count_lines(path) - 1, 0)
+    columns = {column: np.empty(capacity, dtype=dtype) for column, dtype in SCHEMA.items()}
+    columns['company_id'] = np.empty(capacity, dtype=np.int32)
+    report = IngestReport()
+
+    n = 0
+    reader = pd.read_csv(
+        path,
+        usecols=list(SCHEMA),
+        dtype={column: object for column, dtype in SCHEMA.items() if dtype == object},
+        na_values=NA_VALUES,
+        chunksize=chunksize
+    )
+    for chunk in reader:
+        report.rows_read += len(chunk)
+        chunk = coerce_chunk(chunk, report)
+        chunk = chunk.assign(company_id=companies.encode(chunk['company']))
+        if on_chunk is not None:
+            on_chunk(chunk)
+        for column, values in columns.items():
+            values[n:n + len(chunk)] = chunk[column].to_numpy(dtype=values.dtype)
+        n += len(chunk)
+
+    report.rows_kept = n
+    report.company_spellings = len(companies.raw_ids)
+    report.companies = len(companies.keys)
+    # Raw spellings are dropped in favour of each company's display name
+    columns['company'][:n] = companies.display(columns['company_id'][:n])
+    df = pd.DataFrame({column: values[:n] for column, values in columns.items()}, copy=False)
+    logger.info("ingested %s\n%s", path, report)
+    # Dropped or blanked rows change the numbers, so they are worth a warning
+    if report.rejected or report.coerced:
+        logger.warning("%s: rejected %d of %d rows and blanked %d values; see /api/ingest-report "
+                       "or python src/metadata.py", path, report.rows_read - report.rows_kept,
+                       report.rows_read, sum(report.coerced.values()))
+    return df, report
@@ -0,0 +1,315 @@
+"""Concurrent-user load test against the real Dash callback endpoint.
+
+Starts the dashboard locally (or targets ``--url``), then runs N virtual
+sessions. Each session loads the page and replays a seeded interaction trace
+against ``/_dash-update-component``. The trace mixes slider drags on
+``timestamp-slider``, multi-select changes on ``company-dropdown``, changes to
+the level, title, gender and education filters and tab switches. Traces draw
+the same random values whatever the app supports, so one seed gives every app
+the same actions; actions an app has no control for are skipped. Like the
+Dash renderer, a session fires every callback an input feeds, then the
+callbacks chained off their outputs. Throughput and p50/p95/p99 latency are
+reported per callback output and per interaction. Tab switches are
+client-side in both apps, so they only cost anything once a callback listens
+to ``tabs.value``.
+Run both apps with the same seed to compare them::
+
+    python src/loadtest.py --app app app_new --sessions 20 --actions 15
+"""
+import argparse
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from companies import CompanyCanonicalizer
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+# Browsers cap concurrent requests per host at about six
+BROWSER_CONNECTIONS = 6
+FILTER_PROPS = ('level-dropdown', 'title-dropdown', 'gender-dropdown', 'education-dropdown')
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def start_server(module, port, timeout=300):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [SRC_DIR, os.environ.get('PYTHONPATH')])))
+    process = subprocess.Popen(
+        [sys.executable, '-c',
+         f"import {module}; {module}.server.run(host='127.0.0.1', port={port}, threaded=True)"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+    url = f'http://127.0.0.1:{port}'
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{module} exited during startup:\n{process.stderr.read().decode()[-2000:]}")
+        try:
+            get_json(url + '/_dash-layout')
+            return process, url
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.5)
+    process.kill()
+    raise RuntimeError(f"{module} did not start within {timeout}s")
+
+def get_json(url):
+    with urllib.request.urlopen(url) as response:
+        return json.loads(response.read())
+
+def post_json(url, body):
+    request = urllib.request.Request(url, data=json.dumps(body).encode(),
+                                     headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request) as response:
+        if response.status == 204:
+            return None
+        return json.loads(response.read())
+
+def collect_props(node, props):
+    """Walk the serialised layout and record every prop of every component with an id."""
+    if isinstance(node, list):
+        for child in node:
+            collect_props(child, props)
+    elif isinstance(node, dict) and 'props' in node:
+        component_props = node['props']
+        if 'id' in component_props:
+            for prop, value in component_props.items():
+                if prop != 'children':
+                    props[f"{component_props['id']}.{prop}"] = value
+        collect_props(component_props.get('children'), props)
+
+def output_label(output):
+    # "..a.figure@hash...b.data.." -> "a.figure,b.data"
+    return ','.join(re.sub(r'@\w+$', '', part) for part in output.strip('.').split('...'))
+
+class Callback:
+    def __init__(self, dependency):
+        self.output = dependency['output']
+        self.label = output_label(self.output)
+        self.multi = self.output.startswith('..')
+        self.outputs = [
+            dict(zip(('id', 'property'), part.split('.', 1)))
+            for part in self.label.split(',')
+        ]
+        self.inputs = [f"{i['id']}.{i['property']}" for i in dependency['inputs']]
+        self.state = [f"{s['id']}.{s['property']}" for s in dependency['state']]
+        self.prevent_initial_call = dependency.get('prevent_initial_call', False)
+
+    def body(self, props, changed):
+        def values(names):
+            return [dict(zip(('id', 'property'), name.split('.', 1)), value=props.get(name)) for name in names]
+        return {
+            'output': self.output,
+            'outputs': self.outputs if self.multi else self.outputs[0],
+            'inputs': values(self.inputs),
+            'state': values(self.state),
+            'changedPropIds': sorted(changed)
+        }
+
+class Session:
+    """One virtual browser session replaying its trace."""
+
+    def __init__(self, url, callbacks, layout_props, stats):
+        self.url = url
+        self.callbacks = callbacks
+        self.props = dict(layout_props)
+        self.stats = stats
+
+    def fire(self, callback, changed):
+        start = time.perf_counter()
+        try:
+            result = post_json(self.url + '/_dash-update-component', callback.body(self.props, changed))
+        except (urllib.error.URLError, ConnectionError) as error:
+            self.stats.record_error(callback.label, error)
+            return set()
+        self.stats.record(callback.label, time.perf_counter() - start)
+
+        updated = set()
+        for component_id, component_props in ((result or {}).get('response') or {}).items():
+            for prop, value in component_props.items():
+                self.props[f"{component_id}.{prop}"] = value
+                updated.add(f"{component_id}.{prop}")
+        return updated
+
+    def interact(self, pool, changed, initial=False):
+        """Fire callbacks wave by wave until the chain settles."""
+        if initial:
+            wave = [cb for cb in self.callbacks if not cb.prevent_initial_call]
+        else:
+            wave = [cb for cb in self.callbacks if changed & set(cb.inputs)]
+        while wave:
+            updates = list(pool.map(lambda cb: self.fire(cb, changed & set(cb.inputs)), wave))
+            changed = set().union(*updates)
+            wave = [cb for cb in self.callbacks if changed & set(cb.inputs)]
+
+    def run(self, trace, think_time):
+        with ThreadPoolExecutor(BROWSER_CONNECTIONS) as pool:
+            for kind, prop, value in trace:
+                start = time.perf_counter()
+                if kind == 'load':
+                    self.interact(pool, set(), initial=True)
+                elif prop is not None:
+                    self.props[prop] = value
+                    self.interact(pool, {prop})
+                # Actions the app has no control for are no-ops, but still wait the think time
+                if kind == 'load' or prop is not None:
+                    self.stats.record_interaction(kind, time.perf_counter() - start)
+                if think_time:
+                    time.sleep(random.expovariate(1 / think_time))
+
+def company_choices(options):
+    """Company dropdown values, one per canonical company, in canonical key order.
+
+    Apps label and key the dropdown differently (one display name per
+    company id, or every raw spelling), so picks go by the canonical key of
+    each label, which is the same in every app.
+    """
+    keys = CompanyCanonicalizer.load().canonical_keys(option['label'] for option in options)
+    choices = {}
+    for key, label, value in sorted(zip(keys, (option['label'] for option in options),
+                                        (option['value'] for option in options)), key=lambda choice: choice[:2]):
+        choices.setdefault(key, value)
+    return list(choices.values())
+
+def build_trace(layout_props, actions, rng):
+    """Seeded list of ``(kind, prop, value)`` actions; ``prop`` is None for a no-op.
+
+    Each kind of action draws the same random values whether or not the app
+    supports it, so the rest of the trace does not depend on the app.
+    """
+    slider_max = layout_props.get('timestamp-slider.max', 0)
+    companies = company_choices(layout_props.get('company-dropdown.options', []))
+    filters = {prop: [option['value'] for option in layout_props[prop + '.options']]
+               for prop in FILTER_PROPS if prop + '.options' in layout_props}
+    tabs = ['tab-1', 'tab-2']
+
+    trace = [('load', None, None)]
+    selected = []
+    for _ in range(actions):
+        kind = rng.choices(['slider', 'dropdown', 'filter', 'tab'], weights=[5, 4, 2, 1])[0]
+        if kind == 'slider':
+            start = rng.randint(0, slider_max)
+            trace.append((kind, 'timestamp-slider.value', [start, rng.randint(start, slider_max)]))
+        elif kind == 'dropdown':
+            remove = rng.random() < 0.4
+            # Favour the head of the option list so sessions overlap on companies
+            rank = int(rng.expovariate(1 / 20))
+            if not companies:
+                trace.append((kind, None, None))
+                continue
+            if selected and remove:
+                selected = selected[:-1]
+            else:
+                selected = selected + [companies[min(rank, len(companies) - 1)]]
+            trace.append((kind, 'company-dropdown.value', list(selected) or None))
+        elif kind == 'filter':
+            prop = rng.choice(FILTER_PROPS)
+            picks = [rng.random() for _ in range(rng.randint(0, 2))]
+            if prop not in filters:
+                trace.append((kind, None, None))
+                continue
+            options = filters[prop]
+            values = list(dict.fromkeys(options[int(pick * len(options))] for pick in picks))
+            trace.append((kind, prop + '.value', values or None))
+        else:
+            tabs.reverse()
+            trace.append(('tab', 'tabs.value', tabs[0]))
+    return trace
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.interactions = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, label, seconds):
+        with self.lock:
+            self.latencies[label].append(seconds)
+
+    def record_error(self, label, error):
+        with self.lock:
+            self.errors[label] += 1
+
+    def record_interaction(self, kind, seconds):
+        with self.lock:
+            self.interactions[kind].append(seconds)
+
+    def summary(self, wall_time):
+        def describe(samples):
+            p50, p95, p99 = np.percentile(samples, [50, 95, 99]) * 1000
+            return {'count': len(samples), 'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p99}
+        requests = sum(len(samples) for samples in self.latencies.values())
+        return {
+            'wall_time_s': wall_time,
+            'requests': requests,
+            'throughput_rps': requests / wall_time if wall_time else 0,
+            'errors': dict(self.errors),
+            'callbacks': {label: describe(samples) for label, samples in sorted(self.latencies.items())},
+            'interactions': {kind: describe(samples) for kind, samples in sorted(self.interactions.items())}
+        }
+
+def run_load_test(url, sessions, actions, think_time, seed):
+    callbacks = [Callback(dependency) for dependency in get_json(url + '/_dash-dependencies')]
+    layout_props = {}
+    collect_props(get_json(url + '/_dash-layout'), layout_props)
+
+    stats = Stats()
+    rng = random.Random(seed)
+    traces = [build_trace(layout_props, actions, random.Random(rng.random())) for _ in range(sessions)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(sessions) as pool:
+        list(pool.map(lambda trace: Session(url, callbacks, layout_props, stats).run(trace, think_time), traces))
+    return stats.summary(time.perf_counter() - start)
+
+def print_summary(name, summary):
+    print(f"\n== {name}: {summary['requests']} requests in {summary['wall_time_s']:.1f}s "
+          f"({summary['throughput_rps']:.1f} req/s)")
+    for section in ('callbacks', 'interactions'):
+        print(f"  {section[:-1]:<56}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for label, row in summary[section].items():
+            print(f"  {label[:56]:<56}{row['count']:>6}{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}")
+    for label, count in summary['errors'].items():
+        print(f"  errors in {label}: {count}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--app', nargs='+', default=['app'], help='app module(s) under src/ to start and test')
+    parser.add_argument('--url', help='test an already running server instead of starting one')
+    parser.add_argument('--sessions', type=int, default=10, help='concurrent virtual sessions')
+    parser.add_argument('--actions', type=int, default=10, help='interactions per session after page load')
+    parser.add_argument('--think-time', type=float, default=0.5, help='mean pause between interactions (s)')
+    parser.add_argument('--seed', type=int, default=551, help='trace seed; keep it fixed to compare apps')
+    parser.add_argument('--json', help='write the results to this file')
+    args = parser.parse_args()
+
+    results = {}
+    if args.url:
+        results[args.url] = run_load_test(args.url, args.sessions, args.actions, args.think_time, args.seed)
+    else:
+        for module in args.app:
+            process, url = start_server(module, free_port())
+            try:
+                results[module] = run_load_test(url, args.sessions, args.actions, args.think_time, args.seed)
+            finally:
+                process.terminate()
+                process.wait()
+
+    for name, summary in results.items():
+        print_summary(name, summary)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,77 @@
+"""Precomputed layout metadata so the dashboard can start without the dataset.
+
+Run ``python src/metadata.py`` from the repository root after refreshing the
+data to rebuild ``data/processed/metadata.json``; it also prints the ingest
+report, with the rows that were rejected or had values blanked.
+"""
+import json
+import os
+
+import pandas as pd
+
+from aggregates import EDUCATION_LEVELS, gender_categories
+from data import DATA_PATH, dataset_version
+from ingest import read_salaries
+
+METADATA_PATH = 'data/processed/metadata.json'
+# Bump when the layout needs keys older metadata files don't have
+METADATA_FORMAT = 3
+
+def build_metadata(df, version=None):
+    min_date = df['timestamp'].min()
+    max_date = df['timestamp'].max()
+    days = (max_date - min_date).days
+    return {
+        'format': METADATA_FORMAT,
+        'version': version,
+        'min_date': min_date.isoformat(),
+        'max_date': max_date.isoformat(),
+        'days': days,
+        'marks': {
+            str(i): (min_date + pd.Timedelta(days=i)).strftime('%Y')
+            for i in range(0, days + 1, max(1, days // 4))
+        },
+        # [id, display name] pairs, by name
+        'companies': sorted(
+            ([int(company_id), name] for company_id, name in
+             df[df['company_id'] >= 0].groupby('company_id')['company'].first().items()),
+            key=lambda company: company[1]
+        ),
+        # Most common values first
+        'filters': {
+            'level': df['level'].value_counts().index.tolist(),
+            'title': df['title'].value_counts().index.tolist(),
+            'gender_category': gender_categories(df['gender']).value_counts().index.tolist(),
+            'education': list(EDUCATION_LEVELS.values())
+        }
+    }
+
+def write_metadata(df, version=None, path=METADATA_PATH):
+    metadata = build_metadata(df, version)
+    # Workers may rebuild the file at the same time; readers only ever see a whole one
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(metadata, f)
+    os.replace(tmp_path, path)
+    return metadata
+
+def load_metadata(path=METADATA_PATH, data_path=DATA_PATH):
+    """Return the saved metadata, or None if it is missing, unreadable or stale."""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            metadata = json.load(f)
+    except json.JSONDecodeError:
+        return None
+    if metadata.get('format') != METADATA_FORMAT:
+        return None
+    if os.path.exists(data_path) and metadata.get('version') != dataset_version(data_path):
+        return None
+    return metadata
+
+if __name__ == '__main__':
+    df, report = read_salaries(DATA_PATH)
+    print(report)
+    metadata = write_metadata(df, dataset_version())
+    print(f"Wrote {METADATA_PATH}: {metadata['days']} days, {len(metadata['companies'])} companies")
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+
+class MonthlyRollups:
+    """Per company id x month response counts and compensation sums.
+
+    Built chunk by chunk during ingestion (``update``) and answered purely by
+    slicing and merging cells, so the trend panel never rescans rows. Every
+    update also feeds an all-companies cell per month for unfiltered views.
+    Medians come from the month x bin histograms of ``SalarySketches``
+    rather than a second set of digests.
+    """
+
+    ALL = -1
+    COLUMN = 'totalyearlycompensation'
+
+    def __init__(self):
+        ints, floats = np.array([], dtype=np.int64), np.array([], dtype=float)
+        self.cells = pd.DataFrame({'company': ints, 'month': ints, 'count': ints, 'total': floats})
+
+    def update(self, rows):
+        """Fold newly ingested rows into the rollups."""
+        rows = rows[rows[self.COLUMN].notna()]
+        if len(rows) == 0:
+            return
+        codes = rows['company_id'].to_numpy(dtype=np.int64)
+        months = pd.PeriodIndex(rows['timestamp'], freq='M').asi8
+        values = rows[self.COLUMN].to_numpy(dtype=float)
+
+        named = codes != self.ALL
+        codes = np.r_[codes[named], np.full(len(codes), self.ALL)]
+        months = np.r_[months[named], months]
+        values = np.r_[values[named], values]
+
+        new_cells = pd.DataFrame({'company': codes, 'month': months, 'count': 1, 'total': values})
+        self.cells = (
+            pd.concat([self.cells, new_cells])
+            .groupby(['company', 'month'], as_index=False)[['count', 'total']].sum()
+        )
+
+    def _selected(self, first, last, selected_company):
+        table = self.cells
+        in_range = (table['month'] >= first) & (table['month'] <= last)
+        if not selected_company:
+            return table[in_range & (table['company'] == self.ALL)]
+        if not isinstance(selected_company, list):
+            selected_company = [selected_company]
+        return table[in_range & table['company'].isin(selected_company)]
+
+    def trend(self, start_date, end_date, sketches, selected_company=None, window=3):
+        """Monthly responses, mean and median compensation plus rolling versions.
+
+        ``sketches`` is the ``SalarySketches`` of the same rows. Works at
+        month granularity: every month the selection touches is included in
+        full.
+        """
+        first = pd.Period(start_date, 'M')
+        last = pd.Period(end_date, 'M')
+        months = pd.period_range(first, last, freq='M')
+
+        # Rolling windows at the start reach back before the first month
+        extended = np.arange(first.ordinal - window + 1, last.ordinal + 1)
+        cells = self._selected(extended[0], last.ordinal, selected_company)
+        monthly = cells.groupby('month')[['count', 'total']].sum().reindex(extended, fill_value=0)
+        rolling = monthly.rolling(window, min_periods=1).sum().iloc[window - 1:]
+        monthly = monthly.iloc[window - 1:]
+
+        trend = pd.DataFrame({'month': months.to_timestamp(), 'responses': monthly['count'].to_numpy()})
+        with np.errstate(invalid='ignore', divide='ignore'):
+            trend['mean'] = monthly['total'].to_numpy() / monthly['count'].to_numpy()
+            trend['rolling_mean'] = rolling['total'].to_numpy() / rolling['count'].to_numpy()
+
+        trend['median'] = sketches.monthly_quantiles(self.COLUMN, first.ordinal, last.ordinal, selected_company)
+        trend['rolling_median'] = sketches.monthly_quantiles(self.COLUMN, first.ordinal, last.ordinal,
+                                                             selected_company, window=window)
+        return trend
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from aggregates import filter_data
+
+# Sample sizes built at load time, smallest first
+SAMPLE_FRACTIONS = (0.01, 0.1)
+# Selections smaller than this render exactly straight away
+PROGRESSIVE_MIN_ROWS = 20000
+# A sample is only used once it has this many rows in the selection
+SAMPLE_MIN_ROWS = 500
+
+def build_stratified_sample(df, fraction, seed=551):
+    """Sample ``fraction`` of each company x month stratum.
+
+    Each stratum keeps ``fraction * size`` rows with randomized rounding, so
+    every row carries the same Horvitz-Thompson weight of ``1 / fraction`` in
+    the ``sample_weight`` column.
+    """
+    rng = np.random.default_rng(seed)
+    strata = [df['company_id'], df['timestamp'].dt.to_period('M')]
+
+    sizes = df.groupby(strata)['timestamp'].transform('size')
+    keys = pd.Series(rng.random(len(df)), index=df.index)
+    rank = keys.groupby(strata).rank(method='first') - 1
+
+    stratum_ids = df.groupby(strata).ngroup()
+    rounding = pd.Series(rng.random(stratum_ids.max() + 1)).reindex(stratum_ids).to_numpy()
+    quota = np.floor(sizes * fraction + rounding)
+
+    sample = df[rank < quota].copy()
+    sample['sample_weight'] = 1 / fraction
+    return sample
+
+def build_samples(df, fractions=SAMPLE_FRACTIONS):
+    return {fraction: build_stratified_sample(df, fraction) for fraction in sorted(fractions)}
+
+def pick_sample(samples, selected_range, selected_company, min_date, filters=None):
+    """Return ``(fraction, sample_df)`` for a selection worth previewing, else None."""
+    for fraction, sample in samples.items():
+        sample_df = filter_data(sample, selected_range, selected_company, min_date, filters)
+        if len(sample_df) / fraction < PROGRESSIVE_MIN_ROWS:
+            return None
+        if len(sample_df) >= SAMPLE_MIN_ROWS:
+            return fraction, sample_df
+    return None
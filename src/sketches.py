@@ -0,0 +1,226 @@
+import numpy as np
+import pandas as pd
+
+SKETCH_COLUMNS = ["totalyearlycompensation", "basesalary", "stockgrantvalue", "bonus"]
+# Fixed log-spaced value grid (about 3% per bin) shared by every sketch, so
+# sketches merge by adding counts; values outside it land in the end bins
+GRID = np.geomspace(1e3, 1e8, 400)
+N_BINS = len(GRID) + 1
+
+def grid_bins(values):
+    """Grid bin of each value, -1 for NaN."""
+    bins = np.searchsorted(GRID, values).astype(np.int16)
+    bins[np.isnan(values)] = -1
+    return bins
+
+# Bounds of each grid bin; the open-ended end bins get no width
+BIN_LOWER = np.r_[-np.inf, GRID]
+BIN_UPPER = np.r_[GRID, np.inf]
+BIN_WIDTH = np.r_[0, np.diff(GRID), 0]
+
+def grid_quantiles(counts, sums, qs):
+    """Quantiles ``qs`` of each row of stacked grid histograms.
+
+    ``counts`` and ``sums`` have one row per histogram and one column per
+    bin. Bins are in value order, so nothing is sorted. A bin's rows are
+    modelled as evenly spaced points around the bin mean, spread as widely
+    as the bin bounds allow (a lone value sits exactly on its mean), and
+    quantiles interpolate between neighbouring points. Returns an array of
+    shape ``(rows, len(qs))``, NaN for empty histograms.
+    """
+    groups = np.arange(len(counts))[:, None]
+    cumulative = counts.cumsum(axis=1)
+    totals = cumulative[:, -1:]
+    # Offset each row so one searchsorted over the flattened table finds every row's bin
+    offsets = groups * (totals.max() + 1)
+    flat = (cumulative + offsets).ravel()
+
+    def point(k):
+        # Value of the k-th smallest point (0-based) in each row
+        pos = np.minimum(np.searchsorted(flat, k + offsets, side='right') - groups * N_BINS, N_BINS - 1)
+        n = counts[groups, pos]
+        mean = sums[groups, pos] / n
+        width = np.minimum(BIN_WIDTH[pos], 2 * np.minimum(mean - BIN_LOWER[pos], BIN_UPPER[pos] - mean))
+        return mean + (k - cumulative[groups, pos] + n / 2 + 0.5) * width / n
+
+    last = np.maximum(totals - 1, 0)
+    position = np.clip(np.asarray(qs) * totals - 0.5, 0, last)
+    below = np.floor(position)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        lo, hi = point(below), point(np.minimum(below + 1, last))
+        values = lo + (position - below) * (hi - lo)
+    values[totals[:, 0] == 0] = np.nan
+    return values
+
+class SalarySketches:
+    """Mergeable quantile sketches per month for the salary columns.
+
+    Each value is counted into a fixed grid bin, keeping month x bin counts
+    and sums as prefix sums over months. A bin's mean is its centroid, so a
+    range of whole months merges by one subtraction, without sorting; the
+    partial months at either end of a range, and the rows of explicitly
+    selected companies, are binned from the (timestamp sorted) raw rows.
+
+    Per company quantiles are exact instead: each column keeps its rows
+    ordered by (company, value), and the k-th smallest value of a company
+    inside a range is found from a running count of the rows in the range.
+    """
+
+    def __init__(self, df, columns=SKETCH_COLUMNS):
+        self.columns = columns
+
+        rows = df.sort_values('timestamp')
+        self.timestamps = rows['timestamp'].to_numpy()
+        # Company codes are the canonical company ids; -1 is no company
+        self.codes = rows['company_id'].to_numpy(dtype=np.int64)
+        self.n_companies = int(self.codes.max()) + 1 if len(rows) else 0
+        self.company_rows = np.argsort(self.codes, kind='stable')
+        self.company_offsets = np.searchsorted(self.codes[self.company_rows], np.arange(self.n_companies + 1))
+        ordinals = pd.PeriodIndex(rows['timestamp'], freq='M').asi8
+        self.first_month = int(ordinals.min()) if len(rows) else 0
+        self.months = months = ordinals - self.first_month
+        self.n_months = int(months.max()) + 1 if len(rows) else 0
+        # Start of each month (and of the month after the last), with the first row at or after it
+        self.month_starts = pd.period_range(pd.Period(ordinal=self.first_month, freq='M'),
+                                            periods=self.n_months + 1, freq='M').to_timestamp().to_numpy()
+        self.month_rows = np.searchsorted(self.timestamps, self.month_starts, side='left')
+
+        self.values = {col: rows[col].to_numpy(dtype=float) for col in columns}
+        self.bins = {col: grid_bins(self.values[col]) for col in columns}
+        self.prefix = {}
+        self.ranked = {}
+        for col in columns:
+            self._build(col, months)
+
+    def _build(self, col, months):
+        bins, values = self.bins[col], self.values[col]
+        valid = bins >= 0
+
+        key = months[valid] * N_BINS + bins[valid]
+        size = self.n_months * N_BINS
+        shape = (self.n_months, N_BINS)
+        counts = np.bincount(key, minlength=size).reshape(shape)
+        sums = np.bincount(key, weights=values[valid], minlength=size).reshape(shape)
+        zero = np.zeros((1, N_BINS))
+        self.prefix[col] = (np.vstack([zero, counts.cumsum(axis=0)]), np.vstack([zero, sums.cumsum(axis=0)]))
+
+        rows = np.flatnonzero(valid & (self.codes >= 0))
+        rows = rows[np.lexsort((values[rows], self.codes[rows]))]
+        offsets = np.searchsorted(self.codes[rows], np.arange(self.n_companies + 1))
+        self.ranked[col] = (rows, values[rows], offsets)
+
+    def _codes(self, selected_company):
+        if not selected_company:
+            return None
+        if not isinstance(selected_company, list):
+            selected_company = [selected_company]
+        codes = np.unique(np.array(selected_company, dtype=np.int64))
+        return codes[(codes >= 0) & (codes < self.n_companies)]
+
+    def _split(self, start_date, end_date):
+        """Row bounds ``[i, j)`` of the range and its whole months ``first..last``."""
+        start, end = np.datetime64(start_date, 'ns'), np.datetime64(end_date, 'ns')
+        i = np.searchsorted(self.timestamps, start, side='left')
+        j = np.searchsorted(self.timestamps, end, side='right')
+        # Month m is whole when it starts at or after start and the next one starts after end
+        first = np.searchsorted(self.month_starts, start, side='left')
+        last = np.searchsorted(self.month_starts, end + np.timedelta64(1, 'ns'), side='right') - 2
+        return i, j, first, min(last, self.n_months - 1)
+
+    def _edge_rows(self, split):
+        i, j, first, last = split
+        if first > last:
+            return np.arange(i, j)
+        return np.concatenate([np.arange(i, self.month_rows[first]), np.arange(self.month_rows[last + 1], j)])
+
+    def _selected_rows(self, split, codes):
+        """Rows of the selected companies inside the range."""
+        i, j = split[:2]
+        parts = []
+        for code in codes:
+            rows = self.company_rows[self.company_offsets[code]:self.company_offsets[code + 1]]
+            parts.append(rows[np.searchsorted(rows, i):np.searchsorted(rows, j)])
+        return np.concatenate(parts) if parts else np.array([], dtype=np.int64)
+
+    def _histogram(self, col, split, rows):
+        """Grid counts and sums of one column over ``rows``, plus the whole months when ``split`` is given."""
+        bins = self.bins[col][rows]
+        valid = bins >= 0
+        counts = np.bincount(bins[valid], minlength=N_BINS).astype(float)
+        sums = np.bincount(bins[valid], weights=self.values[col][rows][valid], minlength=N_BINS)
+        if split is not None and split[2] <= split[3]:
+            first, last = split[2:]
+            prefix_counts, prefix_sums = self.prefix[col]
+            counts += prefix_counts[last + 1] - prefix_counts[first]
+            sums += prefix_sums[last + 1] - prefix_sums[first]
+        return counts, sums
+
+    def quantiles(self, col, start_date, end_date, selected_company=None, qs=(0.25, 0.5, 0.75, 0.9)):
+        return self.percentiles(start_date, end_date, selected_company, qs, [col])[col]
+
+    def percentiles(self, start_date, end_date, selected_company=None, qs=(0.25, 0.5, 0.75, 0.9), columns=None):
+        """``{column: {q: value}}`` for every sketched column over one selection."""
+        split = self._split(start_date, end_date)
+        codes = self._codes(selected_company)
+        if codes is None:
+            rows = self._edge_rows(split)
+        else:
+            rows, split = self._selected_rows(split, codes), None
+        columns = columns or self.columns
+        counts, sums = zip(*(self._histogram(col, split, rows) for col in columns))
+        values = grid_quantiles(np.vstack(counts), np.vstack(sums), qs)
+        return {col: dict(zip(qs, row)) for col, row in zip(columns, values)}
+
+    def monthly_quantiles(self, col, first, last, selected_company=None, q=0.5, window=1):
+        """Quantile ``q`` for each month ``first..last`` (period ordinals).
+
+        Each month covers the ``window`` months ending with it, merged from
+        the same month x bin histograms as ``percentiles``.
+        """
+        codes = self._codes(selected_company)
+        if codes is None:
+            cumulative_counts, cumulative_sums = self.prefix[col]
+        else:
+            rows = self._selected_rows((0, len(self.timestamps)), codes)
+            bins = self.bins[col][rows]
+            valid = bins >= 0
+            key = self.months[rows][valid] * N_BINS + bins[valid]
+            size = self.n_months * N_BINS
+            shape = (self.n_months, N_BINS)
+            counts = np.bincount(key, minlength=size).reshape(shape)
+            sums = np.bincount(key, weights=self.values[col][rows][valid], minlength=size).reshape(shape)
+            zero = np.zeros((1, N_BINS))
+            cumulative_counts = np.vstack([zero, counts.cumsum(axis=0)])
+            cumulative_sums = np.vstack([zero, sums.cumsum(axis=0)])
+
+        ends = np.arange(first, last + 1) - self.first_month + 1
+        upper = np.clip(ends, 0, self.n_months)
+        lower = np.clip(ends - window, 0, self.n_months)
+        counts = cumulative_counts[upper] - cumulative_counts[lower]
+        sums = cumulative_sums[upper] - cumulative_sums[lower]
+        return grid_quantiles(counts, sums, [q])[:, 0]
+
+    def company_quantiles(self, col, start_date, end_date, selected_company=None, q=0.5, n=None):
+        """Quantile ``q`` per company, indexed by company id; only the ``n`` largest when given."""
+        i, j = self._split(start_date, end_date)[:2]
+        rows, values, offsets = self.ranked[col]
+        if len(rows) == 0:
+            return pd.Series(dtype=float)
+        inside = np.cumsum((rows >= i) & (rows < j), dtype=np.int32)
+        before = np.r_[0, inside][offsets]
+        sizes = np.diff(before)
+        # Same linear interpolation as pandas, between the ranks around q
+        position = q * np.maximum(sizes - 1, 0)
+        below = np.floor(position)
+        ranks = before[:-1] + np.stack([below, np.minimum(below + 1, np.maximum(sizes - 1, 0))])
+        lo, hi = values[np.minimum(np.searchsorted(inside, ranks + 1), len(values) - 1)]
+        result = lo + (position - below) * (hi - lo)
+
+        present = sizes > 0
+        codes = self._codes(selected_company)
+        if codes is not None:
+            present &= np.isin(np.arange(self.n_companies), codes)
+        present = np.flatnonzero(present)
+        if n is not None:
+            present = present[np.argsort(-result[present], kind='stable')[:n]]
+        return pd.Series(result[present], index=present)
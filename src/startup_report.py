@@ -0,0 +1,77 @@
+"""Cold start report for the dashboard.
+
+Imports ``app`` in a fresh interpreter under ``python -X importtime`` and
+reports the slowest imports, plus how long the first layout and the first
+data load take. Run from the repository root::
+
+    python src/startup_report.py [--top 15] [--json startup.json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Executed in the child interpreter after the import has been timed
+PHASES = """
+import json, time
+t = time.perf_counter(); import app; phases = {'import app': time.perf_counter() - t}
+t = time.perf_counter(); app.serve_layout(); phases['first layout'] = time.perf_counter() - t
+t = time.perf_counter(); app.get_data(); phases['first data load'] = time.perf_counter() - t
+print(json.dumps(phases))
+"""
+
+def parse_importtime(stderr):
+    """Turn ``-X importtime`` output into (module, self_us, cumulative_us, depth) rows."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+def run_report(top=15):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [SRC_DIR, os.environ.get('PYTHONPATH')])))
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PHASES],
+        capture_output=True, text=True, env=env
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    imports = parse_importtime(result.stderr)
+    # Depth 1 rows are the modules imported directly by a top-level import
+    direct = [row for row in imports if row[3] == 1]
+    return {
+        'phases': json.loads(result.stdout.strip().splitlines()[-1]),
+        'total_import_us': sum(row[2] for row in imports if row[3] == 0),
+        'slowest_imports': [
+            {'module': name, 'cumulative_us': cumulative, 'self_us': self_us}
+            for name, self_us, cumulative, _ in sorted(direct, key=lambda row: -row[2])[:top]
+        ]
+    }
+
+def print_report(report):
+    print("Startup phases:")
+    for phase, seconds in report['phases'].items():
+        print(f"  {phase:<20}{seconds * 1000:>10.1f} ms")
+    print(f"\nTotal import time: {report['total_import_us'] / 1000:.1f} ms")
+    print("Slowest direct imports:")
+    for row in report['slowest_imports']:
+        print(f"  {row['module']:<40}{row['cumulative_us'] / 1000:>10.1f} ms")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--top', type=int, default=15, help='number of imports to list')
+    parser.add_argument('--json', help='also write the report to this file')
+    args = parser.parse_args()
+
+    report = run_report(args.top)
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)